@@ -5,14 +5,72 @@ Handles LLM integration and message generation for negotiation agents
 
 import os
 import re
-from typing import Dict, List, Optional, Any
-from config.config import OPENAI_API_KEY, ANTHROPIC_API_KEY, LLM_PROVIDER, LLM_MODEL
+from array import array
+from functools import lru_cache, partial
+from typing import Dict, List, Optional, Any, Tuple, Generator, Callable
+import numpy as np
+from config.config import (
+    OPENAI_API_KEY, ANTHROPIC_API_KEY, LLM_PROVIDER, LLM_MODEL,
+    HISTORY_ANCHOR_MESSAGES, HISTORY_RECENT_MESSAGES
+)
 from personas.persona_manager import PersonaManager
 
 
+# Price patterns like $700, $1,200, 700 dollars, at 700 fused into one alternation
+# so a message is scanned once; the leftmost price mention wins
+_PRICE_RE = re.compile(
+    r'\$\s*(?P<dollar>\d+(?:,\d{3})*(?:\.\d{2})?)'  # $700, $1,200.50
+    r'|(?P<bare>\d+(?:,\d{3})*(?:\.\d{2})?)\s*dollars?'  # 700 dollars
+    r'|(?:at|for|offer|price|pay)\s+\$?\s*(?P<prep>\d+(?:,\d{3})*(?:\.\d{2})?)',  # at $700, for 700
+    re.IGNORECASE
+)
+
+# Fixed instructions that open every agent's system prompt
+_AGENT_SYSTEM_PROMPT = "You are a negotiation agent. Follow the instructions carefully and generate realistic negotiation messages."
+
+# Sampling settings for agent messages
+_AGENT_TEMPERATURE = 0.7
+_AGENT_MAX_TOKENS = 200
+
+# Every price pattern needs a digit, so this cheap check rules out most chit-chat
+_HAS_DIGIT = re.compile(r'\d').search
+
+
+@lru_cache(maxsize=256)
+def _linear_utility(price: float, zero_price: float, ideal_price: float) -> float:
+    """
+    Utility of a price on a linear value function (memoized)
+    
+    zero_price is where utility is 0 (seller's minimum / buyer's maximum),
+    ideal_price is where it reaches 1.
+    """
+    # Utility = how much surplus captured relative to ideal
+    utility = (price - zero_price) / (ideal_price - zero_price)
+    return max(0.0, min(1.0, utility))  # Clamp to [0, 1]
+
+
 class Agent:
     """Base class for negotiation agents"""
     
+    # Fixed attribute layout: no per-instance __dict__, cheaper attribute access.
+    # Subclasses that add attributes must declare their own __slots__.
+    __slots__ = (
+        # Identity and scenario
+        "agent_id", "persona_name", "scenario_public_info", "agent_secrets", "persona_manager",
+        # LLM configuration
+        "llm_provider", "llm_model", "llm_client", "async_llm_client",
+        "_call_provider", "_call_provider_async", "_stream_provider",
+        "_create_kwargs", "_system_message",
+        # Prompt
+        "_static_prompt", "_system_prompt", "last_prompt",
+        # Conversation tracking
+        "conversation_history", "proposals_made", "round_count", "my_price_offers",
+        "_history_rendered", "_chat_history", "_history_window", "history_summarizer",
+        "_messages_sent_count",
+        # Utility value function
+        "_utility_role", "_ideal_price", "_utility_zero_price", "_utility_mode", "_utility_fn",
+    )
+    
     def __init__(
         self,
         agent_id: str,
@@ -43,37 +101,87 @@ class Agent:
         self.llm_provider = llm_provider or LLM_PROVIDER
         self.llm_model = llm_model or LLM_MODEL
         
-        # Initialize LLM client
+        # Initialize LLM client (async client is created on first async call)
         self.llm_client = self._initialize_llm_client()
+        self.async_llm_client = None
         
         # Conversation tracking
         self.conversation_history: List[Dict[str, str]] = []
         self.proposals_made: List[Any] = []
         self.round_count = 0
-        self.my_price_offers: List[float] = []  # Track price offers for consistency
+        self.my_price_offers = array('d')  # Track price offers for consistency (unboxed doubles)
         self.last_prompt: str = ""  # Store the last prompt sent to LLM
+        self._messages_sent_count = 0  # Messages in conversation_history sent by this agent
+        
+        # Rolling renderings of conversation_history, extended one message at a
+        # time so building a prompt doesn't re-format the whole history
+        self._history_rendered: str = ""
+        self._chat_history: List[Dict[str, str]] = []
+        
+        # Long negotiations only send the first/most recent messages to the LLM.
+        # history_summarizer(omitted_messages) -> str may replace the omission marker.
+        self._history_window = (HISTORY_ANCHOR_MESSAGES, HISTORY_RECENT_MESSAGES)
+        self.history_summarizer: Optional[Callable[[List[Dict]], str]] = None
         
         # Validate persona exists
         if not self.persona_manager.configs.persona_exists(persona_name):
             raise ValueError(f"Persona '{persona_name}' not found")
+        
+        # Persona, scenario and secrets are fixed for the agent's lifetime,
+        # so the static part of the prompt is rendered once here
+        self._static_prompt = self.persona_manager.build_static_prompt(
+            persona_name=persona_name,
+            scenario_public_info=scenario_public_info,
+            agent_secrets=agent_secrets
+        )
+        self._system_prompt = _AGENT_SYSTEM_PROMPT + "\n\n" + self._static_prompt
+        
+        # Provider-specific call functions and request arguments
+        self._bind_provider_calls()
+        
+        # Value-function parameters for calculate_utility
+        self._init_utility_params()
     
     def _initialize_llm_client(self):
         """Initialize the appropriate LLM client based on provider"""
         if self.llm_provider == "openai":
             try:
                 from openai import OpenAI
+                from agents.llm_client import get_http_client
                 if not OPENAI_API_KEY:
                     raise ValueError("OPENAI_API_KEY not found in environment")
-                return OpenAI(api_key=OPENAI_API_KEY)
+                return OpenAI(api_key=OPENAI_API_KEY, http_client=get_http_client(self.llm_provider))
             except ImportError:
                 raise ImportError("openai package not installed. Run: pip install openai")
         
         elif self.llm_provider == "anthropic":
             try:
                 from anthropic import Anthropic
+                from agents.llm_client import get_http_client
                 if not ANTHROPIC_API_KEY:
                     raise ValueError("ANTHROPIC_API_KEY not found in environment")
-                return Anthropic(api_key=ANTHROPIC_API_KEY)
+                return Anthropic(api_key=ANTHROPIC_API_KEY, http_client=get_http_client(self.llm_provider))
+            except ImportError:
+                raise ImportError("anthropic package not installed. Run: pip install anthropic")
+        
+        else:
+            raise ValueError(f"Unsupported LLM provider: {self.llm_provider}")
+    
+    def _initialize_async_llm_client(self):
+        """Initialize the async LLM client used by generate_message_async"""
+        if self.llm_provider == "openai":
+            try:
+                from openai import AsyncOpenAI
+                from agents.llm_client import get_async_http_client
+                return AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=get_async_http_client(self.llm_provider))
+            except ImportError:
+                raise ImportError("openai package not installed. Run: pip install openai")
+        
+        elif self.llm_provider == "anthropic":
+            try:
+                from anthropic import AsyncAnthropic
+                from agents.llm_client import get_async_http_client
+                return AsyncAnthropic(api_key=ANTHROPIC_API_KEY, http_client=get_async_http_client(self.llm_provider))
             except ImportError:
                 raise ImportError("anthropic package not installed. Run: pip install anthropic")
         
@@ -90,26 +198,157 @@ class Agent:
         Returns:
             Generated message string
         """
+        message = self.draft_message(conversation_history)
+        self.record_message(message)
+        return message
+    
+    def draft_message(self, conversation_history: List[Dict] = None) -> str:
+        """
+        Generate a message without tracking it as sent
+        
+        Lets a caller produce the next message ahead of time and decide later
+        whether to use it; record_message then tracks it as generate_message would.
+        
+        Args:
+            conversation_history: List of previous messages (optional, uses internal if not provided)
+            
+        Returns:
+            Generated message string
+        """
+        chat_messages = self._prepare_prompt(conversation_history)
+        
+        # Generate message using LLM
+        return self._call_llm(chat_messages)
+    
+    async def generate_message_async(self, conversation_history: List[Dict] = None) -> str:
+        """
+        Async version of generate_message
+        
+        Args:
+            conversation_history: List of previous messages (optional, uses internal if not provided)
+            
+        Returns:
+            Generated message string
+        """
+        chat_messages = self._prepare_prompt(conversation_history)
+        
+        # Generate message using LLM
+        message = await self._call_llm_async(chat_messages)
+        
+        self.record_message(message)
+        return message
+    
+    def generate_message_stream(self, conversation_history: List[Dict] = None) -> Generator[str, None, str]:
+        """
+        Generate a negotiation message, yielding text chunks as the LLM streams them
+        
+        Lets a UI show the reply as it is written instead of waiting for the
+        whole completion. The message is tracked once the stream finishes.
+        
+        Args:
+            conversation_history: List of previous messages (optional, uses internal if not provided)
+            
+        Yields:
+            Text chunks of the message
+        Returns:
+            Complete generated message string
+        """
+        chat_messages = self._prepare_prompt(conversation_history)
+        
+        chunks = []
+        for chunk in self._call_llm_stream(chat_messages):
+            chunks.append(chunk)
+            yield chunk
+        
+        message = "".join(chunks).strip()
+        self.record_message(message)
+        return message
+    
+    def _prepare_prompt(self, conversation_history: List[Dict] = None) -> List[Dict[str, str]]:
+        """
+        Build the prompt for the next message and remember it for display
+        
+        Returns:
+            Chat messages to send after the system prompt. The system prompt
+            only depends on persona and scenario, and each earlier turn is its
+            own chat message, so the request prefix stays byte-identical
+            across turns and can be served from the provider's prompt cache.
+        """
         # Use provided history or internal history
         history = conversation_history if conversation_history is not None else self.conversation_history
+        anchor_count, recent_count = self._history_window
         
-        # Build the prompt
-        prompt = self.persona_manager.build_agent_prompt(
-            persona_name=self.persona_name,
-            scenario_public_info=self.scenario_public_info,
-            agent_secrets=self.agent_secrets,
+        if len(history) > anchor_count + recent_count:
+            # Too long: only send the anchor and most recent messages
+            rendered_history, chat_messages = self._build_windowed_history(history)
+        elif conversation_history is not None:
+            # Caller-supplied history: format it from scratch
+            rendered_history = None
+            chat_messages = self.persona_manager.build_chat_messages(
+                conversation_history=history,
+                agent_id=self.agent_id
+            )
+        else:
+            # Internal history: reuse the rolling renderings
+            rendered_history = self._history_rendered
+            chat_messages = self.persona_manager.finish_chat_messages(self._chat_history)
+        
+        # Build the per-turn part of the prompt
+        dynamic_prompt = self.persona_manager.build_dynamic_prompt(
             conversation_history=history,
             round_number=len(history) + 1,
             agent_id=self.agent_id,
-            my_previous_offers=self.my_price_offers
+            rendered_history=rendered_history
         )
         
         # Store the prompt for debugging/display
-        self.last_prompt = prompt
+        self.last_prompt = self._static_prompt + "\n" + dynamic_prompt
         
-        # Generate message using LLM
-        message = self._call_llm(prompt)
+        return chat_messages
+    
+    def _build_windowed_history(self, history: List[Dict]) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Render a long history keeping only the anchor and most recent messages
+        
+        Bounds the prompt size (and prefill cost) regardless of negotiation length.
+        Messages keep their original round numbers.
+        
+        Returns:
+            Tuple of (rendered history text, chat messages)
+        """
+        anchor_count, recent_count = self._history_window
+        recent_start = len(history) - recent_count
+        anchor = history[:anchor_count]
+        omitted = history[anchor_count:recent_start]
+        recent = history[recent_start:]
+        
+        if self.history_summarizer is not None:
+            gap_text = self.history_summarizer(omitted)
+        else:
+            gap_text = f"[... {len(omitted)} earlier messages omitted ...]"
+        
+        rendered_entries = [
+            self.persona_manager.format_history_entry(i, message, self.agent_id)
+            for i, message in enumerate(anchor, 1)
+        ]
+        rendered_entries.append(gap_text + "\n")
+        rendered_entries.extend(
+            self.persona_manager.format_history_entry(i, message, self.agent_id)
+            for i, message in enumerate(recent, recent_start + 1)
+        )
         
+        chat_messages = []
+        for message in anchor:
+            self.persona_manager.append_chat_message(chat_messages, message, self.agent_id)
+        # The gap note is not from this agent, so it lands in a user turn
+        self.persona_manager.append_chat_message(chat_messages, {"agent": None, "message": gap_text}, self.agent_id)
+        for message in recent:
+            self.persona_manager.append_chat_message(chat_messages, message, self.agent_id)
+        
+        return "\n".join(rendered_entries), self.persona_manager.finish_chat_messages(chat_messages)
+    
+    def record_message(self, message: str):
+        """Track a message this agent just generated (and sent)"""
         # Extract price offer from the message and track it
         price_offer = self._extract_price_from_message(message)
         if price_offer is not None:
@@ -117,51 +356,139 @@ class Agent:
         
         # Track the message
         self.round_count += 1
-        self.conversation_history.append({
-            "agent": self.agent_id,
-            "message": message
-        })
-        
-        return message
+        self._append_to_history(self.agent_id, message)
     
-    def _call_llm(self, prompt: str) -> str:
+    def _call_llm(self, chat_messages: List[Dict[str, str]]) -> str:
         """
         Call the LLM API to generate a response
         
         Args:
-            prompt: Complete prompt string
+            chat_messages: Conversation turns followed by the task instruction
             
         Returns:
             Generated message
         """
         try:
-            if self.llm_provider == "openai":
-                response = self.llm_client.chat.completions.create(
-                    model=self.llm_model,
-                    messages=[
-                        {"role": "system", "content": "You are a negotiation agent. Follow the instructions carefully and generate realistic negotiation messages."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=200
-                )
-                return response.choices[0].message.content.strip()
+            return self._call_provider(chat_messages)
+        except Exception as e:
+            return f"[Error generating message: {str(e)}]"
+    
+    def _call_llm_stream(self, chat_messages: List[Dict[str, str]]) -> Generator[str, None, None]:
+        """
+        Call the LLM API with streaming enabled (mirrors _call_llm)
+        
+        Args:
+            chat_messages: Conversation turns followed by the task instruction
             
-            elif self.llm_provider == "anthropic":
-                response = self.llm_client.messages.create(
-                    model=self.llm_model,
-                    max_tokens=200,
-                    temperature=0.7,
-                    system="You are a negotiation agent. Follow the instructions carefully and generate realistic negotiation messages.",
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                return response.content[0].text.strip()
+        Yields:
+            Text chunks as they arrive
+        """
+        try:
+            yield from self._stream_provider(chat_messages)
+        except Exception as e:
+            yield f"[Error generating message: {str(e)}]"
+    
+    async def _call_llm_async(self, chat_messages: List[Dict[str, str]]) -> str:
+        """
+        Call the LLM API asynchronously (mirrors _call_llm)
+        
+        Args:
+            chat_messages: Conversation turns followed by the task instruction
+            
+        Returns:
+            Generated message
+        """
+        if self.async_llm_client is None:
+            self.async_llm_client = self._initialize_async_llm_client()
         
+        try:
+            return await self._call_provider_async(chat_messages)
         except Exception as e:
             return f"[Error generating message: {str(e)}]"
     
+    def _bind_provider_calls(self):
+        """
+        Resolve the provider-specific call functions and the request arguments
+        that are the same for every call (model, sampling, system prompt)
+        """
+        if self.llm_provider == "openai":
+            self._call_provider = self._call_openai
+            self._call_provider_async = self._call_openai_async
+            self._stream_provider = self._stream_openai
+            self._system_message = {"role": "system", "content": self._system_prompt}
+            self._create_kwargs = {
+                "model": self.llm_model,
+                "temperature": _AGENT_TEMPERATURE,
+                "max_tokens": _AGENT_MAX_TOKENS
+            }
+        else:
+            self._call_provider = self._call_anthropic
+            self._call_provider_async = self._call_anthropic_async
+            self._stream_provider = self._stream_anthropic
+            self._system_message = None
+            self._create_kwargs = {
+                "model": self.llm_model,
+                "max_tokens": _AGENT_MAX_TOKENS,
+                "temperature": _AGENT_TEMPERATURE,
+                # Mark the static block as cacheable; only the turn is new
+                "system": [{
+                    "type": "text",
+                    "text": self._system_prompt,
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }
+    
+    def _call_openai(self, chat_messages: List[Dict[str, str]]) -> str:
+        """OpenAI chat completion"""
+        response = self.llm_client.chat.completions.create(
+            messages=[self._system_message] + chat_messages,
+            **self._create_kwargs
+        )
+        return response.choices[0].message.content.strip()
+    
+    def _call_anthropic(self, chat_messages: List[Dict[str, str]]) -> str:
+        """Anthropic message"""
+        response = self.llm_client.messages.create(
+            messages=chat_messages,
+            **self._create_kwargs
+        )
+        return response.content[0].text.strip()
+    
+    async def _call_openai_async(self, chat_messages: List[Dict[str, str]]) -> str:
+        """OpenAI chat completion (async)"""
+        response = await self.async_llm_client.chat.completions.create(
+            messages=[self._system_message] + chat_messages,
+            **self._create_kwargs
+        )
+        return response.choices[0].message.content.strip()
+    
+    async def _call_anthropic_async(self, chat_messages: List[Dict[str, str]]) -> str:
+        """Anthropic message (async)"""
+        response = await self.async_llm_client.messages.create(
+            messages=chat_messages,
+            **self._create_kwargs
+        )
+        return response.content[0].text.strip()
+    
+    def _stream_openai(self, chat_messages: List[Dict[str, str]]) -> Generator[str, None, None]:
+        """OpenAI chat completion, streamed"""
+        stream = self.llm_client.chat.completions.create(
+            messages=[self._system_message] + chat_messages,
+            stream=True,
+            **self._create_kwargs
+        )
+        for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+    
+    def _stream_anthropic(self, chat_messages: List[Dict[str, str]]) -> Generator[str, None, None]:
+        """Anthropic message, streamed"""
+        with self.llm_client.messages.stream(
+            messages=chat_messages,
+            **self._create_kwargs
+        ) as stream:
+            yield from stream.text_stream
+    
     def add_message_to_history(self, agent_id: str, message: str):
         """
         Add a message from another agent to conversation history
@@ -170,19 +497,37 @@ class Agent:
             agent_id: ID of the agent who sent the message
             message: Message content
         """
-        self.conversation_history.append({
+        self._append_to_history(agent_id, message)
+    
+    def _append_to_history(self, agent_id: str, message: str):
+        """Append a message to conversation_history and its rolling renderings"""
+        entry = {
             "agent": agent_id,
             "message": message
-        })
+        }
+        self.conversation_history.append(entry)
+        if agent_id == self.agent_id:
+            self._messages_sent_count += 1
+        
+        rendered_entry = self.persona_manager.format_history_entry(
+            len(self.conversation_history), entry, self.agent_id
+        )
+        if self._history_rendered:
+            self._history_rendered += "\n" + rendered_entry
+        else:
+            self._history_rendered = rendered_entry
+        
+        self.persona_manager.append_chat_message(self._chat_history, entry, self.agent_id)
     
-    def get_conversation_history(self) -> List[Dict[str, str]]:
+    def get_conversation_history(self) -> Tuple[Dict[str, str], ...]:
         """
         Get the conversation history
         
         Returns:
-            List of message dictionaries
+            Read-only tuple of message dictionaries (shared with the agent,
+            so callers must not modify the dictionaries)
         """
-        return self.conversation_history.copy()
+        return tuple(self.conversation_history)
     
     def _extract_price_from_message(self, message: str) -> Optional[float]:
         """
@@ -194,32 +539,32 @@ class Agent:
         Returns:
             Price as float, or None if no price found
         """
-        # Look for price patterns like $700, $1,200, 700, etc.
-        patterns = [
-            r'\$\s*(\d+(?:,\d{3})*(?:\.\d{2})?)',  # $700, $1,200.50
-            r'(\d+(?:,\d{3})*(?:\.\d{2})?)\s*dollars?',  # 700 dollars
-            r'(?:at|for|offer|price|pay)\s+\$?\s*(\d+(?:,\d{3})*(?:\.\d{2})?)',  # at $700, for 700
-        ]
+        if not _HAS_DIGIT(message):
+            return None
+        
+        match = _PRICE_RE.search(message)
+        if not match:
+            return None
+        
+        # Exactly one named group participates in the match
+        price_str = next(g for g in match.groups() if g)
         
-        for pattern in patterns:
-            matches = re.findall(pattern, message, re.IGNORECASE)
-            if matches:
-                # Clean and convert to float
-                price_str = matches[0].replace(',', '')
-                try:
-                    return float(price_str)
-                except ValueError:
-                    continue
-        
-        return None
+        # Clean and convert to float
+        try:
+            return float(price_str.replace(',', ''))
+        except ValueError:
+            return None
     
     def reset(self):
         """Reset agent state for a new negotiation"""
         self.conversation_history = []
         self.proposals_made = []
         self.round_count = 0
-        self.my_price_offers = []
+        self.my_price_offers = array('d')
         self.last_prompt = ""
+        self._messages_sent_count = 0
+        self._history_rendered = ""
+        self._chat_history = []
     
     def calculate_utility(self, agreement_terms: Dict) -> Optional[float]:
         """
@@ -239,40 +584,74 @@ class Agent:
         if not agreement_terms or "price" not in agreement_terms:
             return None
         
-        agreed_price = agreement_terms["price"]
-        role = self.agent_secrets.get("role", "").lower()
+        if self._utility_fn is None:
+            return None
         
-        # Seller utility calculation
-        if role == "seller":
-            min_price = self.agent_secrets.get("minimum_acceptable_price")
-            ideal_price = self.agent_secrets.get("ideal_price")
-            
-            if min_price is None or ideal_price is None:
-                return None
-            
-            # Utility = how much surplus captured relative to ideal
-            if ideal_price == min_price:
-                return 1.0 if agreed_price >= ideal_price else 0.0
-            
-            utility = (agreed_price - min_price) / (ideal_price - min_price)
-            return max(0.0, min(1.0, utility))  # Clamp to [0, 1]
+        return self._utility_fn(agreement_terms["price"])
+    
+    def calculate_utility_batch(self, prices) -> Optional[np.ndarray]:
+        """
+        Calculate utility scores for many candidate prices at once
         
-        # Buyer utility calculation
-        elif role == "buyer":
-            max_budget = self.agent_secrets.get("maximum_budget")
-            ideal_price = self.agent_secrets.get("ideal_price")
-            
-            if max_budget is None or ideal_price is None:
-                return None
-            
-            # Utility = how much surplus captured relative to ideal
-            if max_budget == ideal_price:
-                return 1.0 if agreed_price <= ideal_price else 0.0
+        Same value function as calculate_utility, evaluated with NumPy so
+        price sweeps and expected-utility estimates avoid a Python loop.
+        
+        Args:
+            prices: Sequence or array of prices
             
-            utility = (max_budget - agreed_price) / (max_budget - ideal_price)
-            return max(0.0, min(1.0, utility))  # Clamp to [0, 1]
+        Returns:
+            Array of utility scores (0.0 to 1.0), or None if cannot calculate
+        """
+        if self._utility_mode is None:
+            return None
         
-        return None
+        prices = np.asarray(prices, dtype=np.float64)
+        
+        # Degenerate range: all-or-nothing around the ideal price
+        if self._utility_mode == "step":
+            if self._utility_role == "seller":
+                return (prices >= self._ideal_price).astype(np.float64)
+            return (prices <= self._ideal_price).astype(np.float64)
+        
+        utilities = (prices - self._utility_zero_price) / (self._ideal_price - self._utility_zero_price)
+        return np.clip(utilities, 0.0, 1.0)
+    
+    def _init_utility_params(self):
+        """
+        Precompute the value-function parameters from agent_secrets
+        
+        Seller: utility is 0 at minimum_acceptable_price, 1 at ideal_price
+        Buyer: utility is 0 at maximum_budget, 1 at ideal_price
+        """
+        self._utility_role = self.agent_secrets.get("role", "").lower()
+        self._ideal_price = self.agent_secrets.get("ideal_price")
+        
+        if self._utility_role == "seller":
+            self._utility_zero_price = self.agent_secrets.get("minimum_acceptable_price")
+        elif self._utility_role == "buyer":
+            self._utility_zero_price = self.agent_secrets.get("maximum_budget")
+        else:
+            self._utility_zero_price = None
+        
+        # Resolve the value-function shape once so calculate_utility is a single call
+        ideal_price = self._ideal_price
+        if self._utility_zero_price is None or ideal_price is None:
+            self._utility_mode = None
+            self._utility_fn = None
+        elif ideal_price == self._utility_zero_price:
+            # Degenerate range: all-or-nothing around the ideal price
+            self._utility_mode = "step"
+            if self._utility_role == "seller":
+                self._utility_fn = lambda price: 1.0 if price >= ideal_price else 0.0
+            else:
+                self._utility_fn = lambda price: 1.0 if price <= ideal_price else 0.0
+        else:
+            self._utility_mode = "linear"
+            self._utility_fn = partial(
+                _linear_utility,
+                zero_price=self._utility_zero_price,
+                ideal_price=ideal_price
+            )
     
     def get_info(self) -> Dict:
         """
@@ -286,5 +665,5 @@ class Agent:
             "persona": self.persona_name,
             "role": self.agent_secrets.get("role", "Unknown"),
             "round_count": self.round_count,
-            "messages_sent": len([m for m in self.conversation_history if m["agent"] == self.agent_id])
+            "messages_sent": self._messages_sent_count
         }
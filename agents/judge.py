@@ -4,10 +4,38 @@ Analyzes negotiation transcripts to determine outcomes, agreements, and winners
 Uses OpenAI Structured Outputs for guaranteed valid JSON responses
 """
 
-from typing import Dict, List, Any, Optional
-from config.config import OPENAI_API_KEY, ANTHROPIC_API_KEY, LLM_PROVIDER, LLM_MODEL
+from typing import Dict, List, Any, Optional, Tuple
+from config.config import (
+    OPENAI_API_KEY, ANTHROPIC_API_KEY, LLM_PROVIDER, LLM_MODEL,
+    JUDGE_MAX_CONCURRENT, JUDGE_MAX_RETRIES, JUDGE_BACKOFF_SECONDS, JUDGE_CACHE_SIZE,
+    JUDGE_SEMANTIC_CACHE, JUDGE_SEMANTIC_THRESHOLD, JUDGE_BATCH_SIZE, JUDGE_PERSISTENT_CACHE,
+    JUDGE_ANALYSIS_BATCH_SIZE,
+    JUDGE_SEMANTIC_ANALYSIS_THRESHOLD, JUDGE_SEMANTIC_ANALYSIS_MESSAGES,
+    JUDGE_BATCH_API_THRESHOLD, JUDGE_BATCH_POLL_SECONDS,
+    JUDGE_QUICK_MODEL, JUDGE_QUICK_MODEL_ANTHROPIC, JUDGE_QUICK_MAX_TOKENS,
+    JUDGE_SCHEMA_WARMUP, JUDGE_SCHEMA_WARMUP_SECONDS,
+    JUDGE_ANCHOR_MESSAGES, JUDGE_RECENT_MESSAGES, JUDGE_LOCAL_PRICE_GAP
+)
+from collections import OrderedDict
+import asyncio
+import copy
+import hashlib
 import json
+import random
 import re
+import threading
+import time
+
+# orjson (optional) decodes responses several times faster than json
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
 
 # Define the JSON schema for structured outputs
 # ACADEMIC APPROACH: Judge only determines FACTS, not subjective ratings
@@ -87,28 +115,516 @@ QUICK_AGREEMENT_SCHEMA = {
                         {"type": "null"}
                     ],
                     "description": "Agent B's actual price offer in this round (for concession analysis), or null if no new offer"
-                },
-                "explanation": {
-                    "type": "string",
-                    "description": "Brief explanation of why agreement was or wasn't reached"
                 }
             },
-            "required": ["agreement_reached", "agreed_price", "agent_a_offer", "agent_b_offer", "explanation"],
+            # No explanation field: output tokens dominate quick check latency
+            "required": ["agreement_reached", "agreed_price", "agent_a_offer", "agent_b_offer"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Full analysis plus the final round's offers (see Judge.analyze_final)
+_FINAL_ANALYSIS_SCHEMA_BODY = copy.deepcopy(JUDGE_ANALYSIS_SCHEMA["json_schema"]["schema"])
+_FINAL_ANALYSIS_SCHEMA_BODY["properties"].update({
+    "agent_a_offer": copy.deepcopy(QUICK_AGREEMENT_SCHEMA["json_schema"]["schema"]["properties"]["agent_a_offer"]),
+    "agent_b_offer": copy.deepcopy(QUICK_AGREEMENT_SCHEMA["json_schema"]["schema"]["properties"]["agent_b_offer"])
+})
+_FINAL_ANALYSIS_SCHEMA_BODY["required"] = _FINAL_ANALYSIS_SCHEMA_BODY["required"] + ["agent_a_offer", "agent_b_offer"]
+
+FINAL_ANALYSIS_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "final_negotiation_analysis",
+        "strict": True,
+        "schema": _FINAL_ANALYSIS_SCHEMA_BODY
+    }
+}
+
+# Batch version of the quick check: one verdict per round, in request order
+_QUICK_BATCH_ITEM_SCHEMA = copy.deepcopy(QUICK_AGREEMENT_SCHEMA["json_schema"]["schema"])
+_QUICK_BATCH_ITEM_SCHEMA["properties"] = {
+    "item": {
+        "type": "integer",
+        "description": "Number of the item (1..K) this verdict is for"
+    },
+    **_QUICK_BATCH_ITEM_SCHEMA["properties"]
+}
+_QUICK_BATCH_ITEM_SCHEMA["required"] = ["item"] + _QUICK_BATCH_ITEM_SCHEMA["required"]
+
+QUICK_AGREEMENT_BATCH_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "quick_agreement_batch",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "rounds": {
+                    "type": "array",
+                    "items": _QUICK_BATCH_ITEM_SCHEMA,
+                    "description": "One verdict per item, in the order given"
+                }
+            },
+            "required": ["rounds"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Batch version of the full analysis: one analysis per transcript, in request order
+_ANALYSIS_BATCH_ITEM_SCHEMA = copy.deepcopy(JUDGE_ANALYSIS_SCHEMA["json_schema"]["schema"])
+_ANALYSIS_BATCH_ITEM_SCHEMA["properties"] = {
+    "item": {
+        "type": "integer",
+        "description": "Number of the transcript (1..K) this analysis is for"
+    },
+    **_ANALYSIS_BATCH_ITEM_SCHEMA["properties"]
+}
+_ANALYSIS_BATCH_ITEM_SCHEMA["required"] = ["item"] + _ANALYSIS_BATCH_ITEM_SCHEMA["required"]
+
+JUDGE_ANALYSIS_BATCH_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "negotiation_analysis_batch",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "analyses": {
+                    "type": "array",
+                    "items": _ANALYSIS_BATCH_ITEM_SCHEMA,
+                    "description": "One analysis per transcript, in the order given"
+                }
+            },
+            "required": ["analyses"],
             "additionalProperties": False
         }
     }
 }
 
+
+def _strip_schema(node: Any) -> Any:
+    """
+    Copy a JSON schema without its "description"/"title" annotations
+    
+    The descriptions document the schemas here, but the prompts already carry
+    the rules, so sending them would only add input tokens to every call.
+    """
+    if isinstance(node, dict):
+        return {
+            key: _strip_schema(value) for key, value in node.items()
+            if key not in ("description", "title") or not isinstance(value, str)
+        }
+    if isinstance(node, list):
+        return [_strip_schema(item) for item in node]
+    return node
+
+
+JUDGE_ANALYSIS_SCHEMA = _strip_schema(JUDGE_ANALYSIS_SCHEMA)
+QUICK_AGREEMENT_SCHEMA = _strip_schema(QUICK_AGREEMENT_SCHEMA)
+FINAL_ANALYSIS_SCHEMA = _strip_schema(FINAL_ANALYSIS_SCHEMA)
+QUICK_AGREEMENT_BATCH_SCHEMA = _strip_schema(QUICK_AGREEMENT_BATCH_SCHEMA)
+JUDGE_ANALYSIS_BATCH_SCHEMA = _strip_schema(JUDGE_ANALYSIS_BATCH_SCHEMA)
+
+# Rules shared by the single-round and batched quick check prompts
+_AGREEMENT_RULES = """AGREEMENT RULES:
+- Only return agreement_reached=TRUE if BOTH agents explicitly agreed to SAME price
+- Look for: "I agree to $X", "I accept $X", "deal at $X", "sold at $X"
+- If one proposes and other accepts SAME price → TRUE
+- If still counter-offering different prices → FALSE
+- If discussing logistics after agreement → still TRUE"""
+
+_PRICE_EXTRACTION_RULES = """PRICE EXTRACTION RULES:
+- Extract the ACTUAL price offer each agent is proposing this round
+- If multiple prices mentioned, extract the PRIMARY offer (usually the last/main one)
+- Ignore year numbers (like "2018 Honda Civic")
+- If agent just acknowledges/accepts without NEW offer → return null
+- If agent says "I accept your offer" → return null (not a new offer)
+
+Examples:
+  "I can offer $750 or maybe $800" → agent_a_offer: 800
+  "How about $700?" → agent_b_offer: 700
+  "2018 Honda Civic for $850" → extract 850 (ignore 2018)
+  "I accept!" → return null (no new offer)
+  "Thank you" → return null (no offer)"""
+
+_QUICK_CHECK_RULES = _AGREEMENT_RULES + "\n\n" + _PRICE_EXTRACTION_RULES
+
+_QUICK_CHECK_TASK = (
+    "For the negotiation round given (Agent A's (Seller) and Agent B's (Buyer) "
+    "messages), decide whether both agents agreed and extract "
+    "each agent's price offer."
+)
+_QUICK_BATCH_TASK = (
+    "For each negotiation round given (ITEM <i>, then Agent A's (Seller) and "
+    "Agent B's (Buyer) messages), judged independently, decide whether both "
+    "agents agreed and extract each agent's price offer."
+)
+
+_QUICK_CHECK_RETURN = "Return JSON with only: agreement_reached, agreed_price, agent_a_offer, agent_b_offer"
+_QUICK_BATCH_RETURN = 'Return JSON with a "rounds" array holding one entry per item, in order, each with only: item, agreement_reached, agreed_price, agent_a_offer, agent_b_offer'
+
+# Full analysis instructions (the transcript itself goes in the user message).
+# Kept short: the output shape is enforced through the schema
+_ANALYSIS_INSTRUCTIONS = "\n".join([
+    "Determine FACTUALLY whether the negotiation transcript ends in an agreement. No subjective opinions, ratings or judgments.",
+    "",
+    "RULES:",
+    "- Only mark agreement_reached=true if BOTH agents explicitly agreed to SAME price",
+    "- Look for explicit acceptance: 'I accept', 'I agree', 'deal', 'sold'",
+    "- Extract the exact agreed price",
+    "- Keep explanation factual (e.g., 'Both agents accepted $712 in round 7')",
+    "- NO subjective opinions about who won or satisfaction levels"
+])
+
+# Batched analyses: several transcripts judged in one request
+_ANALYSIS_BATCH_TASK = "Several negotiation transcripts are given (TRANSCRIPT <i>); judge each one independently."
+
+# Final-round analysis: the full analysis plus the last round's offers, so the
+# last round needs no separate quick check
+_FINAL_ROUND_INSTRUCTIONS = "\n\n".join([
+    "\n".join([
+        "ALSO, for the LAST round of the transcript only, provide:",
+        '  "agent_a_offer": Agent A\'s actual price offer in that round, or null',
+        '  "agent_b_offer": Agent B\'s actual price offer in that round, or null'
+    ]),
+    _PRICE_EXTRACTION_RULES
+])
+
+# Analysis user message: only the transcript varies
+_ANALYSIS_PROMPT_TEMPLATE = "NEGOTIATION TRANSCRIPT:\n{conversation}"
+
+
+def _anthropic_system(text: str) -> List[Dict[str, Any]]:
+    """Anthropic system block marked for prompt caching"""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def _anthropic_tool(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Anthropic request kwargs forcing a reply that matches a response_format schema
+    
+    Anthropic has no response_format; a single tool whose input schema is the
+    JSON schema, with tool_choice set to it, gives the same structured reply.
+    """
+    name = schema["json_schema"]["name"]
+    return {
+        "tools": [{"name": name, "input_schema": schema["json_schema"]["schema"]}],
+        "tool_choice": {"type": "tool", "name": name}
+    }
+
+
+# System prompts: all static instructions live here so every request shares
+# the same cacheable prefix and only the round data / transcript varies
+_QUICK_CHECK_SYSTEM_OPENAI = "\n\n".join([
+    "You are an expert negotiation referee. Be strict: only confirm agreement when BOTH agents explicitly accept the SAME terms.",
+    _QUICK_CHECK_TASK, _QUICK_CHECK_RULES, _QUICK_CHECK_RETURN
+])
+_QUICK_CHECK_SYSTEM_ANTHROPIC = _anthropic_system("\n\n".join([
+    "You are an expert negotiation referee. Return only valid JSON.",
+    _QUICK_CHECK_TASK, _QUICK_CHECK_RULES, _QUICK_CHECK_RETURN
+]))
+_QUICK_BATCH_SYSTEM_OPENAI = "\n\n".join([
+    "You are an expert negotiation referee. Be strict: only confirm agreement when BOTH agents explicitly accept the SAME terms.",
+    _QUICK_BATCH_TASK, _QUICK_CHECK_RULES, _QUICK_BATCH_RETURN
+])
+_QUICK_BATCH_SYSTEM_ANTHROPIC = _anthropic_system("\n\n".join([
+    "You are an expert negotiation referee. Return only valid JSON.",
+    _QUICK_BATCH_TASK, _QUICK_CHECK_RULES, _QUICK_BATCH_RETURN
+]))
+_ANALYSIS_SYSTEM_OPENAI = "\n\n".join([
+    "You are an expert negotiation adjudicator.",
+    _ANALYSIS_INSTRUCTIONS
+])
+_ANALYSIS_SYSTEM_ANTHROPIC = _anthropic_system("\n\n".join([
+    "You are an expert negotiation adjudicator.",
+    _ANALYSIS_INSTRUCTIONS
+]))
+_ANALYSIS_BATCH_SYSTEM_OPENAI = "\n\n".join([
+    "You are an expert negotiation adjudicator.",
+    _ANALYSIS_BATCH_TASK, _ANALYSIS_INSTRUCTIONS
+])
+_ANALYSIS_BATCH_SYSTEM_ANTHROPIC = _anthropic_system("\n\n".join([
+    "You are an expert negotiation adjudicator.",
+    _ANALYSIS_BATCH_TASK, _ANALYSIS_INSTRUCTIONS
+]))
+_FINAL_ANALYSIS_SYSTEM_OPENAI = "\n\n".join([_ANALYSIS_SYSTEM_OPENAI, _FINAL_ROUND_INSTRUCTIONS])
+_FINAL_ANALYSIS_SYSTEM_ANTHROPIC = _anthropic_system("\n\n".join([
+    _ANALYSIS_SYSTEM_ANTHROPIC[0]["text"], _FINAL_ROUND_INSTRUCTIONS
+]))
+
+# Agreement term extraction (_extract_agreement_terms). Agreement words are
+# plain substring matches ("accepted", "agreement" count too)
+_AGREEMENT_RE = re.compile(r'deal|accept|agree|sold|take it', re.IGNORECASE)
+_FINAL_AGREEMENT_RE = re.compile(r'deal|accept|agree|sold|finalize', re.IGNORECASE)
+_DOLLAR_PRICE_RE = re.compile(r'\$(\d+(?:\.\d{2})?)')
+_CONTEXT_PRICE_RE = re.compile(r'(?:at|for|of|price|pay|offer)\s+\$?(\d{3,4})\b', re.IGNORECASE)
+_BARE_NUMBER_RE = re.compile(r'\b(\d{3,4})\b')
+_DIGIT_RE = re.compile(r'\d')
+
+# Streaming quick checks and analyses (agreement_only) stop as soon as this reads false
+_AGREEMENT_FLAG_RE = re.compile(r'"agreement_reached"\s*:\s*(true|false)')
+_NO_AGREEMENT_EARLY_TEXT = json.dumps({
+    "agreement_reached": False,
+    "agreed_price": None,
+    "agent_a_offer": None,
+    "agent_b_offer": None,
+    "explanation": "No agreement (check stopped early)"
+})
+_NO_AGREEMENT_ANALYSIS_EARLY_TEXT = json.dumps({
+    "agreement_reached": False,
+    "agreement_terms": None,
+    "explanation": "No agreement (analysis stopped early)"
+})
+
+
+def _analysis_error(message: str) -> Dict[str, Any]:
+    """
+    Analysis result for a failed Judge call
+    
+    agreement_reached stays False so the result keeps its usual shape, but
+    judge_error marks it as having no verdict: callers must not count it as
+    a real no-agreement outcome.
+    """
+    return {"agreement_reached": False, "agreement_terms": None, "judge_error": message}
+
+# Quick checks are skipped for rounds where neither message mentions a number
+# or any deal/offer wording (greetings, chit-chat). No trailing \b so that
+# "agreed", "accepted", "offering" etc. still trigger a real check
+_TRIGGER_RE = re.compile(r'\$?\d{2,}|\b(?:deal|accept|agree|sold|offer|price)', re.IGNORECASE)
+
+# Rounds where both agents plainly accept the same dollar price ("I accept $700",
+# "Deal at $700!") are decided without an API call. Anything negated, conditional
+# or phrased as a question is left to the LLM
+_ACCEPT_PRICE_RE = re.compile(
+    r'\b(?:accept|agree|deal|sold|take it|finalize).{0,40}?\$(\d{2,5}(?:\.\d{2})?)',
+    re.IGNORECASE
+)
+_HEDGE_RE = re.compile(r"\b(?:not|no|never|cannot|if|unless|would you|could you)\b|n't|\?", re.IGNORECASE)
+
+# Exact-match response cache shared by all Judge instances (LRU, keyed by
+# a hash of the request). Stores response text so every caller parses its
+# own copy of the result.
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+_response_cache_lock = threading.Lock()  # Judges may run in worker threads
+
+
+def _request_cache_key(request: Dict[str, Any]) -> str:
+    """Hash the parts of a request that determine the response"""
+    schema_name = (
+        request.get("response_format", {}).get("json_schema", {}).get("name", "")
+        or request.get("tool_choice", {}).get("name", "")
+    )
+    system = request.get("system", "")
+    if isinstance(system, list):
+        system = "".join(block["text"] for block in system)
+    parts = [request["model"], schema_name, str(request.get("temperature")), system]
+    parts.extend(message["content"] for message in request["messages"])
+    return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """Look up a cached response text, marking it as recently used"""
+    with _response_cache_lock:
+        text = _response_cache.get(key)
+        if text is not None:
+            _response_cache.move_to_end(key)
+        return text
+
+
+def _cache_put(key: str, text: str):
+    """Store a response text, evicting the least recently used entry when full"""
+    with _response_cache_lock:
+        _response_cache[key] = text
+        if len(_response_cache) > JUDGE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+# Persistent analysis cache in MongoDB (see JUDGE_PERSISTENT_CACHE)
+_persistent_store = None
+_persistent_store_loaded = False
+
+
+def _get_persistent_store():
+    """Get the MongoDB client backing the persistent cache (None when disabled or unreachable)"""
+    global _persistent_store, _persistent_store_loaded
+    if not _persistent_store_loaded:
+        _persistent_store_loaded = True
+        if JUDGE_PERSISTENT_CACHE:
+            try:
+                from utils.mongodb_client import get_mongodb_client
+                _persistent_store = get_mongodb_client()
+            except Exception as e:
+                print(f"⚠️ Judge: MongoDB unavailable, persistent cache disabled ({e})")
+    return _persistent_store
+
+
+def _stored_response(request: Dict[str, Any]) -> Optional[str]:
+    """Look a response up in the in-process cache, then in the persistent one"""
+    key = _request_cache_key(request)
+    text = _cache_get(key)
+    if text is not None or request.get("temperature"):
+        return text
+    
+    store = _get_persistent_store()
+    if store is None:
+        return None
+    text = store.get_judge_response(key)
+    if text is not None:
+        _cache_put(key, text)
+    return text
+
+
+def _store_response(request: Dict[str, Any], text: str):
+    """Keep a fresh deterministic response in the persistent cache"""
+    store = _get_persistent_store()
+    if store is not None and not request.get("temperature"):
+        store.save_judge_response(_request_cache_key(request), text)
+
+
+# Semantic cache for quick checks (see agents/semantic_cache.py)
+_semantic_cache = None
+_semantic_cache_loaded = False
+
+# Numbers quoted in a message; part of the semantic cache namespace so that
+# paraphrases naming different prices never share a verdict
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*')
+
+
+def get_semantic_cache():
+    """Get or create the semantic cache singleton (None when disabled or unavailable)"""
+    global _semantic_cache, _semantic_cache_loaded
+    if not _semantic_cache_loaded:
+        _semantic_cache_loaded = True
+        if JUDGE_SEMANTIC_CACHE:
+            try:
+                from agents.semantic_cache import SemanticCache
+                _semantic_cache = SemanticCache(threshold=JUDGE_SEMANTIC_THRESHOLD)
+            except ImportError:
+                print("⚠️ Judge: sentence-transformers not installed, semantic cache disabled")
+    return _semantic_cache
+
+
+# Background schema warmup (see JUDGE_SCHEMA_WARMUP): (model, schema name) -> schema
+_warmup_schemas: Dict[Tuple[str, str], Dict] = {}
+_warmup_timer = None
+_warmup_lock = threading.Lock()
+
+
+def _warm_schemas(client):
+    """Send a 1-token request per registered (model, schema), then reschedule"""
+    global _warmup_timer
+    with _warmup_lock:
+        targets = list(_warmup_schemas.items())
+    
+    for (model, _), schema in targets:
+        try:
+            client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": "warmup"}],
+                response_format=schema,
+                max_tokens=1
+            )
+        except Exception:
+            pass  # Truncated/failed warmups are expected and harmless
+    
+    with _warmup_lock:
+        # Reschedule unless stopped or superseded by a newer timer
+        if _warmup_timer is threading.current_thread():
+            _warmup_timer = threading.Timer(JUDGE_SCHEMA_WARMUP_SECONDS, _warm_schemas, args=(client,))
+            _warmup_timer.daemon = True
+            _warmup_timer.start()
+
+
+def start_schema_warmup(client, targets: List[Tuple[str, Dict]]):
+    """
+    Register (model, schema) pairs to keep warm and start the warmup timer
+    
+    The first warmup runs right away in the background, so the schemas are
+    compiled before the first real request instead of during it.
+    
+    Args:
+        client: OpenAI client to send warmups with
+        targets: List of (model, response_format schema) pairs
+    """
+    global _warmup_timer
+    with _warmup_lock:
+        new = False
+        for model, schema in targets:
+            key = (model, schema["json_schema"]["name"])
+            if key not in _warmup_schemas:
+                _warmup_schemas[key] = schema
+                new = True
+        if _warmup_timer is None or new:
+            if _warmup_timer is not None:
+                _warmup_timer.cancel()
+            _warmup_timer = threading.Timer(0, _warm_schemas, args=(client,))
+            _warmup_timer.daemon = True
+            _warmup_timer.start()
+
+
+def stop_schema_warmup():
+    """Stop the background schema warmup"""
+    global _warmup_timer
+    with _warmup_lock:
+        if _warmup_timer is not None:
+            _warmup_timer.cancel()
+            _warmup_timer = None
+
+
+def _openai_create_kwargs(request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    OpenAI create() kwargs for a request, with the schema sent via extra_body
+    
+    The schemas are prebuilt, JSON-ready module constants; passed as
+    response_format the SDK re-walks and transforms them on every call, while
+    extra_body is sent as-is. The request body on the wire is the same.
+    """
+    if "response_format" not in request:
+        return request
+    kwargs = dict(request)
+    kwargs["extra_body"] = {"response_format": kwargs.pop("response_format")}
+    return kwargs
+
+
+def _openai_text(response: Any) -> str:
+    """
+    Message text of a chat completion
+    
+    Not stripped: structured outputs are bare JSON. A missing text (e.g. a
+    refusal) raises, like any other failed call.
+    """
+    text = response.choices[0].message.content
+    if text is None:
+        raise ValueError(f"Empty response (refusal: {getattr(response.choices[0].message, 'refusal', None)})")
+    return text
+
+
+def _anthropic_text(response: Any) -> str:
+    """Reply of an Anthropic message as text (the forced tool call's input as JSON)"""
+    for block in response.content:
+        if block.type == "tool_use":
+            return _json_dumps(block.input)
+    return response.content[0].text.strip()
+
+
+def _is_retryable_error(error: Exception) -> bool:
+    """Rate limits (429) and timeouts are worth retrying, anything else is not"""
+    return getattr(error, "status_code", None) == 429 or "Timeout" in type(error).__name__
+
+
 class Judge:
     """Adjudicator that analyzes negotiation outcomes"""
     
-    def __init__(self, llm_provider: str = None, llm_model: str = None):
+    def __init__(self, llm_provider: str = None, llm_model: str = None, quick_model: str = None):
         """
         Initialize the Judge
         
         Args:
             llm_provider: LLM provider to use (openai or anthropic)
             llm_model: Model name to use
+            quick_model: Smaller model for per-round quick checks
         """
         self.llm_provider = llm_provider or LLM_PROVIDER
         
@@ -123,36 +639,72 @@ class Judge:
         else:
             self.llm_model = LLM_MODEL
         
+        # Quick checks are a small, tightly-schema'd task: use a faster model
+        if quick_model:
+            self.quick_model = quick_model
+        elif self.llm_provider == "openai":
+            self.quick_model = JUDGE_QUICK_MODEL
+        else:
+            self.quick_model = JUDGE_QUICK_MODEL_ANTHROPIC
+        
         self.llm_client = self._initialize_llm_client()
+        self.async_llm_client = None  # Created on first async call
+        
+        # Quick checks answered without an API call (see _TRIGGER_RE / _ACCEPT_PRICE_RE)
+        self.quick_checks_total = 0
+        self.quick_checks_skipped = 0
+        self.quick_checks_local = 0
+        
+        # Last transcript formatted by _format_conversation:
+        # (messages list, formatted entries, last formatted message)
+        self._conversation_cache = (None, [], None)
+        
+        # Compile this Judge's structured-output schemas up front and keep them warm
+        if JUDGE_SCHEMA_WARMUP and self.llm_provider == "openai":
+            start_schema_warmup(self.llm_client, [
+                (self.quick_model, QUICK_AGREEMENT_SCHEMA),
+                (self.quick_model, QUICK_AGREEMENT_BATCH_SCHEMA),
+                (self.llm_model, JUDGE_ANALYSIS_SCHEMA)
+            ])
     
     def _initialize_llm_client(self):
-        """Initialize the appropriate LLM client"""
+        """Get the appropriate LLM client (shared by all Judge instances)"""
         if self.llm_provider == "openai":
             try:
-                from openai import OpenAI
+                from agents.llm_client import get_llm_client
                 if not OPENAI_API_KEY:
                     raise ValueError("OPENAI_API_KEY not found in environment")
-                return OpenAI(api_key=OPENAI_API_KEY)
+                return get_llm_client(self.llm_provider)
             except ImportError:
                 raise ImportError("openai package not installed")
         
         elif self.llm_provider == "anthropic":
             try:
-                from anthropic import Anthropic
+                from agents.llm_client import get_llm_client
                 if not ANTHROPIC_API_KEY:
                     raise ValueError("ANTHROPIC_API_KEY not found in environment")
-                return Anthropic(api_key=ANTHROPIC_API_KEY)
+                return get_llm_client(self.llm_provider)
             except ImportError:
                 raise ImportError("anthropic package not installed")
         
         else:
             raise ValueError(f"Unsupported LLM provider: {self.llm_provider}")
     
+    def _initialize_async_llm_client(self):
+        """Get the async LLM client used by the a* methods (shared by all Judge instances)"""
+        try:
+            from agents.llm_client import get_async_llm_client
+            return get_async_llm_client(self.llm_provider)
+        except ImportError:
+            raise ImportError(f"{self.llm_provider} package not installed")
+    
     def check_agreement_quick(
         self,
         message_a: str,
         message_b: str,
-        round_num: int
+        round_num: int,
+        scenario_id: str = "",
+        agreement_only: bool = False
     ) -> Dict[str, Any]:
         """
         Quick check if agreement was reached AND extract price offers
@@ -162,7 +714,12 @@ class Judge:
         Args:
             message_a: Agent A's most recent message
             message_b: Agent B's most recent message
-            round_num: Current round number
+            round_num: Current round number (not part of the request, so a repeated
+                       exchange reuses the cached verdict)
+            scenario_id: Scenario identifier, keeps semantic cache hits within a scenario
+            agreement_only: Caller only needs agreement_reached - with OpenAI the
+                            response is streamed and cut off as soon as it says
+                            there is no agreement (price offers are then None)
             
         Returns:
             Dictionary with:
@@ -170,337 +727,1209 @@ class Judge:
                 - agreed_price (float or None): Final agreed price
                 - agent_a_offer (float or None): Agent A's price offer this round
                 - agent_b_offer (float or None): Agent B's price offer this round
-                - explanation (str): Brief explanation
+                - explanation (str, optional): Only set when decided without the LLM
         """
-        # Build quick check prompt (now includes price extraction!)
-        prompt = f"""You are a negotiation referee. Analyze this negotiation round and provide:
-1. Agreement status (did both agents agree?)
-2. Price offers (what price did each agent propose?)
-
-ROUND {round_num}:
-
-Agent A (Seller): "{message_a}"
-
-Agent B (Buyer): "{message_b}"
-
-AGREEMENT RULES:
-- Only return agreement_reached=TRUE if BOTH agents explicitly agreed to SAME price
-- Look for: "I agree to $X", "I accept $X", "deal at $X", "sold at $X"
-- If one proposes and other accepts SAME price → TRUE
-- If still counter-offering different prices → FALSE
-- If discussing logistics after agreement → still TRUE
-
-PRICE EXTRACTION RULES:
-- Extract the ACTUAL price offer each agent is proposing this round
-- If multiple prices mentioned, extract the PRIMARY offer (usually the last/main one)
-- Ignore year numbers (like "2018 Honda Civic")
-- If agent just acknowledges/accepts without NEW offer → return null
-- If agent says "I accept your offer" → return null (not a new offer)
-
-Examples:
-  "I can offer $750 or maybe $800" → agent_a_offer: 800
-  "How about $700?" → agent_b_offer: 700
-  "2018 Honda Civic for $850" → extract 850 (ignore 2018)
-  "I accept!" → return null (no new offer)
-  "Thank you" → return null (no offer)
-
-Return JSON with: agreement_reached, agreed_price, agent_a_offer, agent_b_offer, explanation"""
-
+        if self._is_trivial_round(message_a, message_b):
+            return self._no_price_result()
+        
+        result = self._regex_agreement(message_a, message_b)
+        if result is not None:
+            return result
+        
+        namespace, vector, cached = self._semantic_lookup(message_a, message_b, scenario_id)
+        if cached is not None:
+            return _json_loads(cached)
+        
+        request = self._quick_check_request(message_a, message_b)
         try:
-            if self.llm_provider == "openai":
-                response = self.llm_client.chat.completions.create(
-                    model=self.llm_model,
-                    temperature=0.1,
-                    messages=[
-                        {"role": "system", "content": "You are an expert negotiation referee. Be strict: only confirm agreement when BOTH agents explicitly accept the SAME terms."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    response_format=QUICK_AGREEMENT_SCHEMA,
-                    max_tokens=150
-                )
-                result = json.loads(response.choices[0].message.content.strip())
-                return result
+            if agreement_only and self.llm_provider == "openai":
+                text, complete = self._create_until_no_agreement(request)
+            else:
+                text, complete = self._create(request), True
+            result = _json_loads(text)
             
-            elif self.llm_provider == "anthropic":
-                # Anthropic doesn't support structured outputs, use basic parsing
-                response = self.llm_client.messages.create(
-                    model=self.llm_model,
-                    max_tokens=150,
-                    temperature=0.1,
-                    system="You are an expert negotiation referee. Return only valid JSON.",
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                result = json.loads(response.content[0].text.strip())
-                return result
-                
+            # A reported agreement ends the negotiation: confirm it with the Judge model
+            if self._needs_confirmation(result):
+                text = self._create(self._quick_check_request(message_a, message_b, self.llm_model))
+                result = _json_loads(text)
         except Exception as e:
-            print(f"Quick agreement check error: {e}")
-            return {
-                "agreement_reached": False,
-                "agreed_price": None,
-                "explanation": f"Error during check: {str(e)}"
-            }
+            return self._quick_check_error(e)
+        
+        if complete:
+            self._semantic_store(namespace, vector, text)
+        return result
     
-    def analyze_negotiation(
+    async def acheck_agreement_quick(
         self,
-        messages: List[Dict],
-        scenario_info: Dict,
-        agent_a_secrets: Dict,
-        agent_b_secrets: Dict,
-        scenario_type: str = "price_negotiation"
+        message_a: str,
+        message_b: str,
+        round_num: int,
+        scenario_id: str = ""
     ) -> Dict[str, Any]:
         """
-        Analyze a complete negotiation transcript and determine the outcome
+        Async version of check_agreement_quick
         
         Args:
-            messages: List of all messages in the negotiation
-            scenario_info: Public scenario information
-            agent_a_secrets: Agent A's private information
-            agent_b_secrets: Agent B's private information
-            scenario_type: Type of scenario (price_negotiation, resource_allocation, etc.)
+            message_a: Agent A's most recent message
+            message_b: Agent B's most recent message
+            round_num: Current round number (not part of the request, so a repeated
+                       exchange reuses the cached verdict)
+            scenario_id: Scenario identifier, keeps semantic cache hits within a scenario
             
         Returns:
-            Dictionary with analysis results
+            Same dictionary as check_agreement_quick
         """
-        # Build the analysis prompt
-        prompt = self._build_analysis_prompt(
-            messages, scenario_info, agent_a_secrets, agent_b_secrets, scenario_type
-        )
+        if self._is_trivial_round(message_a, message_b):
+            return self._no_price_result()
         
-        # Get LLM analysis
-        analysis_text = self._call_llm(prompt)
+        result = self._regex_agreement(message_a, message_b)
+        if result is not None:
+            return result
         
-        # Parse the analysis
-        analysis = self._parse_analysis(analysis_text, scenario_type)
+        namespace, vector, cached = self._semantic_lookup(message_a, message_b, scenario_id)
+        if cached is not None:
+            return _json_loads(cached)
         
-        # Extract agreement terms if agreement reached
-        if analysis.get("agreement_reached"):
-            analysis["agreement_terms"] = self._extract_agreement_terms(
-                messages, scenario_type, agent_a_secrets, agent_b_secrets
-            )
-        else:
-            analysis["agreement_terms"] = None
+        request = self._quick_check_request(message_a, message_b)
+        try:
+            text = await self._acreate(request)
+            result = _json_loads(text)
+            
+            # A reported agreement ends the negotiation: confirm it with the Judge model
+            if self._needs_confirmation(result):
+                text = await self._acreate(self._quick_check_request(message_a, message_b, self.llm_model))
+                result = _json_loads(text)
+        except Exception as e:
+            return self._quick_check_error(e)
         
-        return analysis
+        self._semantic_store(namespace, vector, text)
+        return result
     
-    def _build_analysis_prompt(
+    async def batch_check_agreements(
         self,
-        messages: List[Dict],
-        scenario_info: Dict,
-        agent_a_secrets: Dict,
-        agent_b_secrets: Dict,
-        scenario_type: str
-    ) -> str:
-        """Build the prompt for the Judge to analyze the negotiation"""
+        rounds: List[Tuple[str, str, int]],
+        max_concurrent: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run many quick agreement checks concurrently
         
-        # Format conversation
-        conversation_text = self._format_conversation(messages)
-        
-        # Build prompt - FACTUAL ANALYSIS ONLY
-        prompt_parts = []
-        prompt_parts.append("=" * 70)
-        prompt_parts.append("YOU ARE A FACTUAL NEGOTIATION ANALYZER")
-        prompt_parts.append("=" * 70)
-        prompt_parts.append("")
-        prompt_parts.append("Your task: Determine if an agreement was reached (FACTUAL ONLY)")
-        prompt_parts.append("DO NOT provide subjective opinions, ratings, or judgments.")
-        prompt_parts.append("")
-        
-        prompt_parts.append("=" * 70)
-        prompt_parts.append("NEGOTIATION TRANSCRIPT:")
-        prompt_parts.append("=" * 70)
-        prompt_parts.append(conversation_text)
-        prompt_parts.append("")
-        
-        prompt_parts.append("=" * 70)
-        prompt_parts.append("YOUR TASK:")
-        prompt_parts.append("=" * 70)
-        prompt_parts.append("")
-        prompt_parts.append("Analyze the transcript and provide FACTUAL output:")
-        prompt_parts.append("{")
-        prompt_parts.append('  "agreement_reached": true/false,')
-        prompt_parts.append('  "agreement_terms": { "price": 712 } or null,')
-        prompt_parts.append('  "explanation": "Brief factual summary"')
-        prompt_parts.append("}")
-        prompt_parts.append("")
-        prompt_parts.append("RULES:")
-        prompt_parts.append("- Only mark agreement_reached=true if BOTH agents explicitly agreed to SAME price")
-        prompt_parts.append("- Look for explicit acceptance: 'I accept', 'I agree', 'deal', 'sold'")
-        prompt_parts.append("- Extract the exact agreed price")
-        prompt_parts.append("- Keep explanation factual (e.g., 'Both agents accepted $712 in round 7')")
-        prompt_parts.append("- NO subjective opinions about who won or satisfaction levels")
-        prompt_parts.append("")
-        prompt_parts.append("Your analysis (JSON only):")
-        
-        return "\n".join(prompt_parts)
-    
-    def _format_conversation(self, messages: List[Dict]) -> str:
-        """Format conversation messages for the prompt"""
-        lines = []
-        for msg in messages:
-            agent = msg.get("agent", "Unknown")
-            persona = msg.get("persona", "")
-            message = msg.get("message", "")
-            round_num = msg.get("round", 0)
+        Args:
+            rounds: List of (message_a, message_b, round_num) tuples
+            max_concurrent: Maximum checks in flight at once
             
-            lines.append(f"[Round {round_num}] {agent} ({persona}):")
-            lines.append(f"  {message}")
-            lines.append("")
+        Returns:
+            List of quick check results, in the same order as rounds
+        """
+        semaphore = asyncio.Semaphore(max_concurrent or JUDGE_MAX_CONCURRENT)
         
-        return "\n".join(lines)
-    
-    def _call_llm(self, prompt: str) -> str:
-        """Call the LLM API with structured outputs (like FishGPT!)"""
-        try:
-            if self.llm_provider == "openai":
-                # Use structured outputs for guaranteed valid JSON!
-                response = self.llm_client.chat.completions.create(
-                    model=self.llm_model,
-                    temperature=0,  # 0 = deterministic for consistency
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert negotiation adjudicator. Analyze negotiations objectively and provide structured analysis."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    response_format=JUDGE_ANALYSIS_SCHEMA,  # Structured output!
-                    max_tokens=1000
-                )
-                # JSON is guaranteed to be valid!
-                return response.choices[0].message.content.strip()
-            
-            elif self.llm_provider == "anthropic":
-                # Anthropic doesn't support structured outputs yet, use regular JSON mode
-                response = self.llm_client.messages.create(
-                    model=self.llm_model,
-                    max_tokens=1000,
-                    temperature=0.3,
-                    system="You are an expert negotiation adjudicator. Analyze negotiations objectively and provide detailed analysis in JSON format.",
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                return response.content[0].text.strip()
+        async def check(message_a: str, message_b: str, round_num: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.acheck_agreement_quick(message_a, message_b, round_num)
         
-        except Exception as e:
-            return f'{{"error": "{str(e)}"}}'
+        return await asyncio.gather(*(check(*round_messages) for round_messages in rounds))
     
-    def _parse_analysis(self, analysis_text: str, scenario_type: str) -> Dict[str, Any]:
-        """Parse the LLM's analysis response - much simpler with structured outputs!"""
-        try:
-            # With structured outputs, JSON is GUARANTEED to be valid!
-            # No need for markdown stripping or fallback parsing
-            analysis = json.loads(analysis_text)
-            
-            # Validate required fields (though schema guarantees them)
-            if "agreement_reached" not in analysis:
-                analysis["agreement_reached"] = False
+    def check_agreement_batch(self, rounds: List[Dict], batch_size: int = None) -> List[Dict[str, Any]]:
+        """
+        Quick-check many rounds with one API call per batch of rounds
+        
+        Each request packs up to batch_size rounds into a single prompt, so
+        the system prompt and HTTP overhead are paid once per batch. A batch
+        whose response doesn't line up with its rounds falls back to
+        check_agreement_quick for each of them.
+        
+        Args:
+            rounds: List of dicts with message_a, message_b and round_num
+            batch_size: Rounds per request
             
-            return analysis
+        Returns:
+            List of quick check results, in the same order as rounds
+        """
+        batch_size = batch_size or JUDGE_BATCH_SIZE
+        results = [None] * len(rounds)
         
-        except json.JSONDecodeError:
-            # This should rarely happen with structured outputs
-            # But keep fallback just in case
-            return self._fallback_parse(analysis_text)
-    
-    def _fallback_parse(self, text: str) -> Dict[str, Any]:
-        """Fallback parsing if JSON parsing fails"""
-        text_lower = text.lower()
-        
-        # Try to detect agreement
-        agreement_reached = any(phrase in text_lower for phrase in [
-            "agreement reached", "deal was reached", "agreed", "successful negotiation"
-        ]) and not any(phrase in text_lower for phrase in [
-            "no agreement", "failed", "did not reach"
-        ])
+        # Trivial rounds are answered locally; only the rest are sent
+        pending = []
+        for index, r in enumerate(rounds):
+            if self._is_trivial_round(r["message_a"], r["message_b"]):
+                results[index] = self._no_price_result()
+            else:
+                pending.append(index)
         
-        # Try to detect winner
-        winner = "Neither"
-        if "agent a" in text_lower and ("won" in text_lower or "benefited" in text_lower):
-            winner = "Agent A"
-        elif "agent b" in text_lower and ("won" in text_lower or "benefited" in text_lower):
-            winner = "Agent B"
-        elif "both" in text_lower and ("won" in text_lower or "benefited" in text_lower):
-            winner = "Both"
+        for start in range(0, len(pending), batch_size):
+            indices = pending[start:start + batch_size]
+            batch = [rounds[index] for index in indices]
+            batch_results = []
+            try:
+                verdicts = _json_loads(self._create(self._quick_check_batch_request(batch)))["rounds"]
+                if [v.get("item") for v in verdicts] != list(range(1, len(batch) + 1)):
+                    raise ValueError("batch verdicts don't match the rounds sent")
+                for r, verdict in zip(batch, verdicts):
+                    del verdict["item"]
+                    if self._needs_confirmation(verdict):
+                        verdict = _json_loads(self._create(self._quick_check_request(
+                            r["message_a"], r["message_b"], self.llm_model
+                        )))
+                    batch_results.append(verdict)
+            except Exception as e:
+                print(f"Batch agreement check failed ({e}), checking rounds one by one")
+                batch_results = [
+                    self.check_agreement_quick(r["message_a"], r["message_b"], r["round_num"])
+                    for r in batch
+                ]
+            for index, result in zip(indices, batch_results):
+                results[index] = result
         
+        return results
+    
+    def _is_trivial_round(self, message_a: str, message_b: str) -> bool:
+        """Count a quick check and tell whether it can be skipped (no numbers or deal wording)"""
+        self.quick_checks_total += 1
+        if _TRIGGER_RE.search(message_a) or _TRIGGER_RE.search(message_b):
+            return False
+        self.quick_checks_skipped += 1
+        return True
+    
+    def _no_price_result(self) -> Dict[str, Any]:
+        """Quick check result for a round without any price or deal wording"""
         return {
-            "agreement_reached": agreement_reached,
-            "winner": winner,
-            "reasoning": text[:500] if len(text) > 500 else text,
-            "agent_a_satisfaction": "medium",
-            "agent_b_satisfaction": "medium"
+            "agreement_reached": False,
+            "agreed_price": None,
+            "agent_a_offer": None,
+            "agent_b_offer": None,
+            "explanation": "No price or agreement language this round"
         }
     
-    def _extract_agreement_terms(
-        self,
+    def _regex_agreement(self, message_a: str, message_b: str) -> Optional[Dict[str, Any]]:
+        """
+        Decide a round locally when both agents explicitly accept the same price
+        
+        Only unhedged acceptances qualify, and every dollar amount in each
+        message must be that price (within $1).
+        
+        Args:
+            message_a: Agent A's most recent message
+            message_b: Agent B's most recent message
+            
+        Returns:
+            Quick check result, or None if the LLM has to decide
+        """
+        prices = []
+        for message in (message_a, message_b):
+            if _HEDGE_RE.search(message):
+                return None
+            match = _ACCEPT_PRICE_RE.search(message)
+            if not match:
+                return None
+            price = float(match.group(1))
+            if any(abs(float(amount) - price) > 1 for amount in _DOLLAR_PRICE_RE.findall(message)):
+                return None
+            prices.append(price)
+        
+        price_a, price_b = prices
+        if abs(price_a - price_b) > 1:
+            return None
+        
+        self.quick_checks_local += 1
+        return {
+            "agreement_reached": True,
+            "agreed_price": price_b,
+            "agent_a_offer": price_a,
+            "agent_b_offer": price_b,
+            "explanation": f"Both agents explicitly accepted ${price_b:.2f}"
+        }
+    
+    def check_agreement_local(self, message_a: str, message_b: str) -> Optional[Dict[str, Any]]:
+        """
+        Judge a round without any API call when it is clear-cut
+        
+        A plain same-price acceptance by both agents is an agreement. A round
+        without agreement wording where both agents quote a price and the offers
+        are still more than JUDGE_LOCAL_PRICE_GAP apart is not; each agent's offer
+        is then the last dollar amount it quoted. Everything else, including a
+        reply that accepts without naming a price, needs check_agreement_quick.
+        
+        Args:
+            message_a: Agent A's most recent message
+            message_b: Agent B's most recent message
+            
+        Returns:
+            Same dictionary as check_agreement_quick, or None if the LLM has to decide
+        """
+        result = self._regex_agreement(message_a, message_b)
+        if result is None:
+            if _AGREEMENT_RE.search(message_a) or _AGREEMENT_RE.search(message_b):
+                return None
+            
+            # "That works for me" accepts the other side's price without quoting one
+            offer_a = self._last_dollar_amount(message_a)
+            offer_b = self._last_dollar_amount(message_b)
+            if offer_a is None or offer_b is None:
+                return None
+            if abs(offer_a - offer_b) <= JUDGE_LOCAL_PRICE_GAP * max(offer_a, offer_b):
+                return None
+            
+            self.quick_checks_local += 1
+            result = {
+                "agreement_reached": False,
+                "agreed_price": None,
+                "agent_a_offer": offer_a,
+                "agent_b_offer": offer_b,
+                "explanation": "No agreement wording and offers still apart"
+            }
+        
+        self.quick_checks_total += 1
+        return result
+    
+    @staticmethod
+    def _last_dollar_amount(message: str) -> Optional[float]:
+        """Last $ amount quoted in a message, if any"""
+        amounts = _DOLLAR_PRICE_RE.findall(message)
+        return float(amounts[-1]) if amounts else None
+    
+    def _needs_confirmation(self, result: Dict[str, Any]) -> bool:
+        """Whether a quick model verdict should be re-checked by the Judge model"""
+        return self.quick_model != self.llm_model and bool(result.get("agreement_reached"))
+    
+    def _quick_check_request(
+        self,
+        message_a: str,
+        message_b: str,
+        model: str = None
+    ) -> Dict[str, Any]:
+        """Build the provider request kwargs for a quick agreement check (quick model by default)"""
+        # Only the two messages vary; the rules are in the system prompt. The
+        # round number is left out so a repeated exchange hits the response cache
+        prompt = (
+            f'Agent A (Seller): "{message_a}"\n'
+            f'Agent B (Buyer): "{message_b}"'
+        )
+        
+        model = model or self.quick_model
+        if self.llm_provider == "openai":
+            return self._quick_check_request_for_prompt(prompt, model, _QUICK_CHECK_SYSTEM_OPENAI, QUICK_AGREEMENT_SCHEMA, JUDGE_QUICK_MAX_TOKENS)
+        return self._quick_check_request_for_prompt(prompt, model, _QUICK_CHECK_SYSTEM_ANTHROPIC, QUICK_AGREEMENT_SCHEMA, JUDGE_QUICK_MAX_TOKENS)
+    
+    def _quick_check_batch_request(self, rounds: List[Dict]) -> Dict[str, Any]:
+        """Build the provider request kwargs for a batch of quick agreement checks"""
+        prompt = "\n\n".join(
+            f'ITEM {i}:\n'
+            f'Agent A (Seller): "{r["message_a"]}"\n'
+            f'Agent B (Buyer): "{r["message_b"]}"'
+            for i, r in enumerate(rounds, 1)
+        )
+        
+        max_tokens = JUDGE_QUICK_MAX_TOKENS * len(rounds)
+        if self.llm_provider == "openai":
+            return self._quick_check_request_for_prompt(prompt, self.quick_model, _QUICK_BATCH_SYSTEM_OPENAI, QUICK_AGREEMENT_BATCH_SCHEMA, max_tokens)
+        return self._quick_check_request_for_prompt(prompt, self.quick_model, _QUICK_BATCH_SYSTEM_ANTHROPIC, QUICK_AGREEMENT_BATCH_SCHEMA, max_tokens)
+    
+    def _quick_check_request_for_prompt(
+        self,
+        prompt: str,
+        model: str,
+        system: Any,
+        schema: Dict,
+        max_tokens: int
+    ) -> Dict[str, Any]:
+        """Wrap a quick check prompt in provider request kwargs"""
+        if self.llm_provider == "openai":
+            return {
+                "model": model,
+                "temperature": 0,  # Deterministic: identical rounds can share a cached verdict
+                "messages": [
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt}
+                ],
+                "response_format": schema,
+                "max_tokens": max_tokens
+            }
+        
+        # Anthropic: same schema, enforced through a forced tool call
+        return {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": 0,
+            "system": system,
+            "messages": [{"role": "user", "content": prompt}],
+            **_anthropic_tool(schema)
+        }
+    
+    def _semantic_lookup(self, message_a: str, message_b: str, scenario_id: str) -> Tuple:
+        """
+        Look up a quick check in the semantic cache
+        
+        Args:
+            message_a: Agent A's most recent message
+            message_b: Agent B's most recent message
+            scenario_id: Scenario identifier
+            
+        Returns:
+            (namespace, embedding, cached response text) - all None when the
+            semantic cache is disabled; the text is None on a miss
+        """
+        cache = get_semantic_cache()
+        if cache is None:
+            return (None, None, None)
+        
+        namespace = "|".join([
+            self.quick_model,
+            self.llm_model,
+            scenario_id,
+            ",".join(_NUMBER_RE.findall(message_a)),
+            ",".join(_NUMBER_RE.findall(message_b))
+        ])
+        vector = cache.embed(message_a + "\n" + message_b)
+        return (namespace, vector, cache.lookup(namespace, vector))
+    
+    def _semantic_analysis_lookup(self, messages: List[Dict], scenario_type: str) -> Tuple:
+        """
+        Look up a full transcript analysis in the semantic cache
+        
+        Transcripts only match if they have the same length and quote the same
+        numbers; the embedding covers the last messages, where the outcome is
+        decided (the embedding model truncates long inputs anyway).
+        
+        Args:
+            messages: List of all messages in the negotiation
+            scenario_type: Type of scenario
+            
+        Returns:
+            (namespace, embedding, cached response text), as _semantic_lookup
+        """
+        cache = get_semantic_cache()
+        if cache is None:
+            return (None, None, None)
+        
+        texts = [message.get("message", "") for message in messages]
+        namespace = "|".join([
+            "analysis",
+            self.llm_model,
+            scenario_type,
+            str(len(texts)),
+            ",".join(_NUMBER_RE.findall("\n".join(texts)))
+        ])
+        vector = cache.embed("\n".join(texts[-JUDGE_SEMANTIC_ANALYSIS_MESSAGES:]))
+        return (namespace, vector, cache.lookup(namespace, vector, JUDGE_SEMANTIC_ANALYSIS_THRESHOLD))
+    
+    def _semantic_store(self, namespace: Optional[str], vector, text: str):
+        """Store a fresh quick check or analysis response in the semantic cache"""
+        if vector is not None:
+            get_semantic_cache().add(namespace, vector, text)
+    
+    def _quick_check_error(self, error: Exception) -> Dict[str, Any]:
+        """Result returned when a quick agreement check fails"""
+        print(f"Quick agreement check error: {error}")
+        return {
+            "agreement_reached": False,
+            "agreed_price": None,
+            "explanation": f"Error during check: {str(error)}"
+        }
+    
+    def analyze_negotiation(
+        self,
+        messages: List[Dict],
+        scenario_info: Dict,
+        agent_a_secrets: Dict,
+        agent_b_secrets: Dict,
+        scenario_type: str = "price_negotiation",
+        agreement_only: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Analyze a complete negotiation transcript and determine the outcome
+        
+        Args:
+            messages: List of all messages in the negotiation
+            scenario_info: Public scenario information
+            agent_a_secrets: Agent A's private information
+            agent_b_secrets: Agent B's private information
+            scenario_type: Type of scenario (price_negotiation, resource_allocation, etc.)
+            agreement_only: Caller only needs agreement_reached - with OpenAI the
+                            response is streamed and cut off as soon as it says
+                            there is no agreement (with a placeholder explanation)
+            
+        Returns:
+            Dictionary with analysis results
+        """
+        # Build the analysis prompt
+        prompt = self._build_analysis_prompt(
+            messages, scenario_info, agent_a_secrets, agent_b_secrets, scenario_type
+        )
+        
+        # Get LLM analysis (or reuse one for a near-identical transcript)
+        namespace, vector, analysis_text = self._semantic_analysis_lookup(messages, scenario_type)
+        if analysis_text is not None:
+            return self._finish_analysis(
+                analysis_text, messages, agent_a_secrets, agent_b_secrets, scenario_type
+            )
+        analysis_text = self._call_llm(prompt, agreement_only=agreement_only)
+        
+        analysis = self._finish_analysis(
+            analysis_text, messages, agent_a_secrets, agent_b_secrets, scenario_type
+        )
+        if "judge_error" not in analysis and analysis_text != _NO_AGREEMENT_ANALYSIS_EARLY_TEXT:
+            self._semantic_store(namespace, vector, analysis_text)
+        return analysis
+    
+    async def aanalyze_negotiation(
+        self,
+        messages: List[Dict],
+        scenario_info: Dict,
+        agent_a_secrets: Dict,
+        agent_b_secrets: Dict,
+        scenario_type: str = "price_negotiation"
+    ) -> Dict[str, Any]:
+        """
+        Async version of analyze_negotiation
+        
+        Args:
+            messages: List of all messages in the negotiation
+            scenario_info: Public scenario information
+            agent_a_secrets: Agent A's private information
+            agent_b_secrets: Agent B's private information
+            scenario_type: Type of scenario (price_negotiation, resource_allocation, etc.)
+            
+        Returns:
+            Dictionary with analysis results
+        """
+        prompt = self._build_analysis_prompt(
+            messages, scenario_info, agent_a_secrets, agent_b_secrets, scenario_type
+        )
+        namespace, vector, analysis_text = self._semantic_analysis_lookup(messages, scenario_type)
+        if analysis_text is not None:
+            return self._finish_analysis(
+                analysis_text, messages, agent_a_secrets, agent_b_secrets, scenario_type
+            )
+        analysis_text = await self._call_llm_async(prompt)
+        
+        analysis = self._finish_analysis(
+            analysis_text, messages, agent_a_secrets, agent_b_secrets, scenario_type
+        )
+        if "judge_error" not in analysis:
+            self._semantic_store(namespace, vector, analysis_text)
+        return analysis
+    
+    async def analyze_many(
+        self,
+        transcripts: List[Dict],
+        scenario_type: str = "price_negotiation",
+        max_concurrent: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many negotiations concurrently
+        
+        Args:
+            transcripts: List of dicts with "messages" (and optionally
+                         "scenario_info", "agent_a_secrets", "agent_b_secrets")
+            scenario_type: Type of scenario
+            max_concurrent: Maximum analyses in flight at once
+            
+        Returns:
+            List of analysis dictionaries, in the same order as transcripts
+        """
+        semaphore = asyncio.Semaphore(max_concurrent or JUDGE_MAX_CONCURRENT)
+        
+        async def analyze(transcript: Dict) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.aanalyze_negotiation(
+                    transcript["messages"],
+                    transcript.get("scenario_info", {}),
+                    transcript.get("agent_a_secrets", {}),
+                    transcript.get("agent_b_secrets", {}),
+                    scenario_type
+                )
+        
+        return await asyncio.gather(*(analyze(transcript) for transcript in transcripts))
+    
+    def analyze_final(
+        self,
+        messages: List[Dict],
+        scenario_info: Dict,
+        agent_a_secrets: Dict,
+        agent_b_secrets: Dict,
+        scenario_type: str = "price_negotiation"
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Check the last round and analyze the whole negotiation in one LLM call
+        
+        Used for the final round, where check_agreement_quick would otherwise be
+        followed straight away by analyze_negotiation on the same transcript.
+        
+        Args:
+            messages: List of all messages in the negotiation
+            scenario_info: Public scenario information
+            agent_a_secrets: Agent A's private information
+            agent_b_secrets: Agent B's private information
+            scenario_type: Type of scenario (price_negotiation, resource_allocation, etc.)
+            
+        Returns:
+            (quick check result for the last round, analysis results), shaped
+            like check_agreement_quick and analyze_negotiation return them
+        """
+        prompt = self._build_analysis_prompt(
+            messages, scenario_info, agent_a_secrets, agent_b_secrets, scenario_type
+        )
+        analysis_text = self._call_llm(prompt, final=True)
+        analysis = self._parse_analysis(analysis_text, scenario_type)
+        
+        llm_terms = analysis.get("agreement_terms") or {}
+        quick_check = {
+            "agreement_reached": bool(analysis.get("agreement_reached")),
+            "agreed_price": llm_terms.get("price"),
+            "agent_a_offer": analysis.pop("agent_a_offer", None),
+            "agent_b_offer": analysis.pop("agent_b_offer", None),
+            "explanation": analysis.get("explanation", "")
+        }
+        if "judge_error" in analysis:
+            quick_check["judge_error"] = analysis["judge_error"]
+        
+        self._attach_agreement_terms(analysis, messages, agent_a_secrets, agent_b_secrets, scenario_type)
+        if quick_check["agreement_reached"] and analysis["agreement_terms"]:
+            quick_check["agreed_price"] = analysis["agreement_terms"].get("price", quick_check["agreed_price"])
+        
+        return quick_check, analysis
+    
+    def _finish_analysis(
+        self,
+        analysis_text: str,
+        messages: List[Dict],
+        agent_a_secrets: Dict,
+        agent_b_secrets: Dict,
+        scenario_type: str
+    ) -> Dict[str, Any]:
+        """Parse the LLM analysis and attach the agreement terms"""
+        # Parse the analysis
+        analysis = self._parse_analysis(analysis_text, scenario_type)
+        self._attach_agreement_terms(analysis, messages, agent_a_secrets, agent_b_secrets, scenario_type)
+        return analysis
+    
+    def _attach_agreement_terms(
+        self,
+        analysis: Dict[str, Any],
+        messages: List[Dict],
+        agent_a_secrets: Dict,
+        agent_b_secrets: Dict,
+        scenario_type: str
+    ):
+        """Replace the LLM's agreement terms with the ones extracted from the transcript"""
+        # Extract agreement terms if agreement reached
+        if analysis.get("agreement_reached"):
+            analysis["agreement_terms"] = self._extract_agreement_terms(
+                messages, scenario_type, agent_a_secrets, agent_b_secrets
+            )
+        else:
+            analysis["agreement_terms"] = None
+    
+    def analyze_transcripts(
+        self,
+        transcripts: List[Dict],
+        scenario_type: str = "price_negotiation",
+        use_batch_api: bool = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many archived transcripts (e.g. negotiations loaded from MongoDB)
+        
+        Large sweeps go through the OpenAI Batch API (see submit_batch_analysis),
+        smaller ones call analyze_negotiation directly.
+        
+        Args:
+            transcripts: List of dicts with "messages" (and optionally
+                         "scenario_info", "agent_a_secrets", "agent_b_secrets")
+            scenario_type: Type of scenario
+            use_batch_api: Force (True) or skip (False) the Batch API; by default
+                           it is used above JUDGE_BATCH_API_THRESHOLD transcripts
+            
+        Returns:
+            List of analysis dictionaries, in the same order as transcripts
+        """
+        if use_batch_api is None:
+            use_batch_api = self.llm_provider == "openai" and len(transcripts) > JUDGE_BATCH_API_THRESHOLD
+        
+        if use_batch_api:
+            return self.submit_batch_analysis(transcripts, scenario_type)
+        
+        return self.analyze_negotiations_batch(transcripts, scenario_type)
+    
+    def analyze_negotiations_batch(
+        self,
+        transcripts: List[Dict],
+        scenario_type: str = "price_negotiation",
+        batch_size: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many transcripts with one API call per batch of transcripts
+        
+        Each request packs up to batch_size transcripts into a single prompt,
+        so the system prompt and round trip are paid once per batch. A batch
+        whose response doesn't line up with its transcripts falls back to
+        analyze_negotiation for each of them.
+        
+        Args:
+            transcripts: List of dicts with "messages" (and optionally
+                         "scenario_info", "agent_a_secrets", "agent_b_secrets")
+            scenario_type: Type of scenario
+            batch_size: Transcripts per request
+            
+        Returns:
+            List of analysis dictionaries, in the same order as transcripts
+        """
+        batch_size = batch_size or JUDGE_ANALYSIS_BATCH_SIZE
+        analyses = []
+        
+        for start in range(0, len(transcripts), batch_size):
+            batch = transcripts[start:start + batch_size]
+            batch_analyses = []
+            try:
+                verdicts = _json_loads(self._create(self._analysis_batch_request(batch)))["analyses"]
+                if [v.get("item") for v in verdicts] != list(range(1, len(batch) + 1)):
+                    raise ValueError("batch analyses don't match the transcripts sent")
+                for t, verdict in zip(batch, verdicts):
+                    del verdict["item"]
+                    self._attach_agreement_terms(
+                        verdict, t["messages"], t.get("agent_a_secrets", {}), t.get("agent_b_secrets", {}), scenario_type
+                    )
+                    batch_analyses.append(verdict)
+            except Exception as e:
+                print(f"Batch analysis failed ({e}), analyzing transcripts one by one")
+                batch_analyses = [
+                    self.analyze_negotiation(
+                        t["messages"],
+                        t.get("scenario_info", {}),
+                        t.get("agent_a_secrets", {}),
+                        t.get("agent_b_secrets", {}),
+                        scenario_type
+                    )
+                    for t in batch
+                ]
+            analyses.extend(batch_analyses)
+        
+        return analyses
+    
+    def submit_batch_analysis(
+        self,
+        transcripts: List[Dict],
+        scenario_type: str = "price_negotiation",
+        poll_seconds: float = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze transcripts through the OpenAI Batch API and wait for the results
+        
+        Writes one /v1/chat/completions request per transcript to a JSONL file,
+        uploads it, creates a batch job and polls until it finishes. Transcripts
+        already in the response cache are not resubmitted.
+        
+        Args:
+            transcripts: List of dicts with "messages" (and optionally
+                         "scenario_info", "agent_a_secrets", "agent_b_secrets")
+            scenario_type: Type of scenario
+            poll_seconds: Seconds between status checks
+            
+        Returns:
+            List of analysis dictionaries, in the same order as transcripts
+        """
+        self._check_batch_provider()
+        
+        texts, bodies = self._batch_requests(transcripts, scenario_type, skip_cached=True)
+        if bodies:
+            batch = self._create_batch_job(bodies)
+            texts.update(self._wait_for_batch(batch.id, bodies, poll_seconds or JUDGE_BATCH_POLL_SECONDS))
+        
+        return self._finish_batch_analyses(texts, transcripts, scenario_type)
+    
+    def submit_batch(self, transcripts: List[Dict], scenario_type: str = "price_negotiation") -> str:
+        """
+        Submit transcripts to the OpenAI Batch API without waiting for the results
+        
+        A batch can take up to 24h, so long sweeps can submit, exit, and pick the
+        results up later (even from another process) with collect_batch.
+        
+        Args:
+            transcripts: List of dicts with "messages" (and optionally
+                         "scenario_info", "agent_a_secrets", "agent_b_secrets")
+            scenario_type: Type of scenario
+            
+        Returns:
+            Batch ID to pass to collect_batch
+        """
+        self._check_batch_provider()
+        
+        _, bodies = self._batch_requests(transcripts, scenario_type, skip_cached=False)
+        return self._create_batch_job(bodies).id
+    
+    def collect_batch(
+        self,
+        batch_id: str,
+        transcripts: List[Dict],
+        scenario_type: str = "price_negotiation",
+        poll_seconds: float = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Wait for a batch created with submit_batch and return its analyses
+        
+        Args:
+            batch_id: ID returned by submit_batch
+            transcripts: The transcripts passed to submit_batch, in the same order
+            scenario_type: Type of scenario
+            poll_seconds: Seconds between status checks
+            
+        Returns:
+            List of analysis dictionaries, in the same order as transcripts
+        """
+        self._check_batch_provider()
+        
+        _, bodies = self._batch_requests(transcripts, scenario_type, skip_cached=False)
+        texts = self._wait_for_batch(batch_id, bodies, poll_seconds or JUDGE_BATCH_POLL_SECONDS)
+        return self._finish_batch_analyses(texts, transcripts, scenario_type)
+    
+    def _check_batch_provider(self):
+        """The Batch API is OpenAI-only"""
+        if self.llm_provider != "openai":
+            raise ValueError("Batch analysis is only supported for the openai provider")
+    
+    def _batch_requests(
+        self,
+        transcripts: List[Dict],
+        scenario_type: str,
+        skip_cached: bool
+    ) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+        """
+        Build the analysis request body of every transcript, keyed by custom_id
+        
+        Args:
+            transcripts: Transcripts to analyze
+            scenario_type: Type of scenario
+            skip_cached: Return responses already in the cache instead of a body
+            
+        Returns:
+            (cached response text per custom_id, request body per custom_id)
+        """
+        texts: Dict[str, str] = {}
+        bodies: Dict[str, Dict[str, Any]] = {}
+        for i, t in enumerate(transcripts):
+            custom_id = f"transcript-{i}"
+            prompt = self._build_analysis_prompt(
+                t["messages"],
+                t.get("scenario_info", {}),
+                t.get("agent_a_secrets", {}),
+                t.get("agent_b_secrets", {}),
+                scenario_type
+            )
+            body = self._analysis_request(prompt)
+            if skip_cached:
+                cached = _cache_get(_request_cache_key(body))
+                if cached is not None:
+                    texts[custom_id] = cached
+                    continue
+            bodies[custom_id] = body
+        return texts, bodies
+    
+    def _finish_batch_analyses(
+        self,
+        texts: Dict[str, str],
+        transcripts: List[Dict],
+        scenario_type: str
+    ) -> List[Dict[str, Any]]:
+        """Turn batch response texts back into analyses, in transcript order"""
+        return [
+            self._finish_analysis(
+                texts.get(f"transcript-{i}") or _json_dumps(_analysis_error("No batch result")),
+                t["messages"],
+                t.get("agent_a_secrets", {}),
+                t.get("agent_b_secrets", {}),
+                scenario_type
+            )
+            for i, t in enumerate(transcripts)
+        ]
+    
+    def _create_batch_job(self, bodies: Dict[str, Dict[str, Any]]) -> Any:
+        """
+        Upload the requests as a JSONL file and create a batch job for them
+        
+        Args:
+            bodies: Request body per custom_id
+            
+        Returns:
+            The created batch object
+        """
+        lines = [
+            _json_dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body
+            })
+            for custom_id, body in bodies.items()
+        ]
+        batch_file = self.llm_client.files.create(
+            file=("judge_batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = self.llm_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"📦 Submitted Judge batch {batch.id} ({len(lines)} transcripts)")
+        return batch
+    
+    def _wait_for_batch(
+        self,
+        batch_id: str,
+        bodies: Dict[str, Dict[str, Any]],
+        poll_seconds: float
+    ) -> Dict[str, str]:
+        """
+        Wait for a batch job to finish and collect the outputs
+        
+        Args:
+            batch_id: ID of the batch job
+            bodies: Request body per custom_id (used to fill the response cache)
+            poll_seconds: Seconds between status checks
+            
+        Returns:
+            Response text per custom_id (failed requests are missing)
+        """
+        batch = self.llm_client.batches.retrieve(batch_id)
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_seconds)
+            batch = self.llm_client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            print(f"❌ Judge batch {batch.id} ended with status: {batch.status}")
+            return {}
+        
+        texts = {}
+        output = self.llm_client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = _json_loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            custom_id = record["custom_id"]
+            text = response["body"]["choices"][0]["message"]["content"].strip()
+            texts[custom_id] = text
+            if custom_id in bodies:
+                _cache_put(_request_cache_key(bodies[custom_id]), text)
+        
+        print(f"✅ Judge batch {batch.id} completed ({len(texts)}/{len(bodies)} results)")
+        return texts
+    
+    def _build_analysis_prompt(
+        self,
+        messages: List[Dict],
+        scenario_info: Dict,
+        agent_a_secrets: Dict,
+        agent_b_secrets: Dict,
+        scenario_type: str
+    ) -> str:
+        """Build the prompt for the Judge to analyze the negotiation"""
+        # FACTUAL ANALYSIS ONLY - task and rules are in the system prompt
+        return _ANALYSIS_PROMPT_TEMPLATE.format(conversation=self._format_conversation(messages))
+    
+    def _format_conversation(self, messages: List[Dict]) -> str:
+        """
+        Format conversation messages for the prompt
+        
+        Long transcripts keep only the first JUDGE_ANCHOR_MESSAGES and the last
+        JUDGE_RECENT_MESSAGES messages, with an omission marker in between.
+        
+        The entries of the last transcript formatted are kept, so analysing the
+        same (growing) messages list again only formats the new messages.
+        Transcripts are treated as append-only: replacing an earlier message
+        in place is not detected.
+        """
+        cached_messages, entries, last_message = self._conversation_cache
+        if not (
+            cached_messages is messages
+            and len(entries) <= len(messages)
+            and (not entries or messages[len(entries) - 1] is last_message)
+        ):
+            entries = []
+        
+        entries.extend(
+            f"[Round {msg.get('round', 0)}] {msg.get('agent', 'Unknown')} ({msg.get('persona', '')}):\n"
+            f"  {msg.get('message', '')}\n"
+            for msg in messages[len(entries):]
+        )
+        self._conversation_cache = (messages, entries, messages[-1] if messages else None)
+        
+        recent_start = len(entries) - JUDGE_RECENT_MESSAGES
+        if recent_start > JUDGE_ANCHOR_MESSAGES:
+            omitted = recent_start - JUDGE_ANCHOR_MESSAGES
+            return "\n".join(
+                entries[:JUDGE_ANCHOR_MESSAGES]
+                + [f"[... {omitted} earlier messages omitted ...]\n"]
+                + entries[recent_start:]
+            )
+        return "\n".join(entries)
+    
+    def _call_llm(self, prompt: str, final: bool = False, agreement_only: bool = False) -> str:
+        """Call the LLM API with structured outputs (like FishGPT!)"""
+        request = self._analysis_request(prompt, final)
+        try:
+            text = _stored_response(request)
+            if text is None:
+                if agreement_only and self.llm_provider == "openai":
+                    text, complete = self._create_until_no_agreement(request, _NO_AGREEMENT_ANALYSIS_EARLY_TEXT)
+                else:
+                    text, complete = self._create(request), True
+                if complete:
+                    _store_response(request, text)
+            return text
+        except Exception as e:
+            print(f"❌ Judge analysis error: {e}")
+            return _json_dumps(_analysis_error(str(e)))
+    
+    async def _call_llm_async(self, prompt: str) -> str:
+        """Async version of _call_llm"""
+        request = self._analysis_request(prompt)
+        try:
+            text = _stored_response(request)
+            if text is None:
+                text = await self._acreate(request)
+                _store_response(request, text)
+            return text
+        except Exception as e:
+            print(f"❌ Judge analysis error: {e}")
+            return _json_dumps(_analysis_error(str(e)))
+    
+    def _analysis_request(self, prompt: str, final: bool = False) -> Dict[str, Any]:
+        """
+        Build the provider request kwargs for a full transcript analysis
+        
+        Args:
+            prompt: Analysis user message (the formatted transcript)
+            final: Also ask for the last round's offers (see analyze_final)
+        """
+        if self.llm_provider == "openai":
+            # Use structured outputs for guaranteed valid JSON!
+            return {
+                "model": self.llm_model,
+                "temperature": 0,  # 0 = deterministic for consistency
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": _FINAL_ANALYSIS_SYSTEM_OPENAI if final else _ANALYSIS_SYSTEM_OPENAI
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                "response_format": FINAL_ANALYSIS_SCHEMA if final else JUDGE_ANALYSIS_SCHEMA,  # Structured output!
+                "max_tokens": 1000
+            }
+        
+        # Anthropic: same schema, enforced through a forced tool call
+        return {
+            "model": self.llm_model,
+            "max_tokens": 1000,
+            "temperature": 0.3,
+            "system": _FINAL_ANALYSIS_SYSTEM_ANTHROPIC if final else _ANALYSIS_SYSTEM_ANTHROPIC,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            **_anthropic_tool(FINAL_ANALYSIS_SCHEMA if final else JUDGE_ANALYSIS_SCHEMA)
+        }
+    
+    def _analysis_batch_request(self, transcripts: List[Dict]) -> Dict[str, Any]:
+        """Build the provider request kwargs for a batch of full transcript analyses"""
+        prompt = "\n\n".join(
+            f"TRANSCRIPT {i}:\n{self._format_conversation(t['messages'])}"
+            for i, t in enumerate(transcripts, 1)
+        )
+        
+        if self.llm_provider == "openai":
+            return {
+                "model": self.llm_model,
+                "temperature": 0,
+                "messages": [
+                    {"role": "system", "content": _ANALYSIS_BATCH_SYSTEM_OPENAI},
+                    {"role": "user", "content": prompt}
+                ],
+                "response_format": JUDGE_ANALYSIS_BATCH_SCHEMA,
+                "max_tokens": 1000 * len(transcripts)
+            }
+        
+        return {
+            "model": self.llm_model,
+            "max_tokens": 1000 * len(transcripts),
+            "temperature": 0.3,
+            "system": _ANALYSIS_BATCH_SYSTEM_ANTHROPIC,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            **_anthropic_tool(JUDGE_ANALYSIS_BATCH_SCHEMA)
+        }
+    
+    def _create(self, request: Dict[str, Any]) -> str:
+        """Send a request with the sync client (or serve it from the cache) and return the response text"""
+        key = _request_cache_key(request)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        
+        if self.llm_provider == "openai":
+            response = self.llm_client.chat.completions.create(**_openai_create_kwargs(request))
+            text = _openai_text(response)
+        else:
+            response = self.llm_client.messages.create(**request)
+            text = _anthropic_text(response)
+        
+        _cache_put(key, text)
+        return text
+    
+    def _create_until_no_agreement(
+        self,
+        request: Dict[str, Any],
+        early_text: str = _NO_AGREEMENT_EARLY_TEXT
+    ) -> Tuple[str, bool]:
+        """
+        Stream a quick check or analysis (OpenAI) and stop once agreement_reached is false
+        
+        agreement_reached is the first field of QUICK_AGREEMENT_SCHEMA and
+        JUDGE_ANALYSIS_SCHEMA, so a "no agreement" answer is known after a few
+        tokens and the rest of the generation is skipped. Cut-off responses are
+        not cached.
+        
+        Args:
+            request: Quick check or analysis request kwargs
+            early_text: Response text returned when the stream is cut off
+            
+        Returns:
+            (response text, whether it is the complete response)
+        """
+        key = _request_cache_key(request)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached, True
+        
+        parts = []
+        flag_seen = False
+        stream = self.llm_client.chat.completions.create(**_openai_create_kwargs(request), stream=True)
+        try:
+            for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                parts.append(chunk.choices[0].delta.content)
+                
+                if not flag_seen:
+                    match = _AGREEMENT_FLAG_RE.search("".join(parts))
+                    if match:
+                        if match.group(1) == "false":
+                            return early_text, False
+                        flag_seen = True
+        finally:
+            stream.close()
+        
+        text = "".join(parts)
+        _cache_put(key, text)
+        return text, True
+    
+    async def _acreate(self, request: Dict[str, Any]) -> str:
+        """
+        Send a request with the async client (or serve it from the cache) and
+        return the response text
+        
+        Rate limits and timeouts are retried with exponential backoff (plus
+        jitter); other errors are raised immediately.
+        
+        Args:
+            request: Provider request kwargs
+            
+        Returns:
+            Response text
+        """
+        key = _request_cache_key(request)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        
+        if self.async_llm_client is None:
+            self.async_llm_client = self._initialize_async_llm_client()
+        
+        for attempt in range(JUDGE_MAX_RETRIES + 1):
+            try:
+                if self.llm_provider == "openai":
+                    response = await self.async_llm_client.chat.completions.create(**_openai_create_kwargs(request))
+                    text = _openai_text(response)
+                else:
+                    response = await self.async_llm_client.messages.create(**request)
+                    text = _anthropic_text(response)
+                
+                _cache_put(key, text)
+                return text
+            
+            except Exception as e:
+                if attempt == JUDGE_MAX_RETRIES or not _is_retryable_error(e):
+                    raise
+                await asyncio.sleep(JUDGE_BACKOFF_SECONDS * 2 ** attempt + random.uniform(0, 0.5))
+    
+    def _parse_analysis(self, analysis_text: str, scenario_type: str) -> Dict[str, Any]:
+        """Parse the LLM's analysis response - much simpler with structured outputs!"""
+        try:
+            # With structured outputs, JSON is GUARANTEED to be valid!
+            # (error responses from _call_llm are JSON too)
+            return _json_loads(analysis_text)
+        except json.JSONDecodeError:
+            # Both providers are schema-constrained, so only a response cut off
+            # at max_tokens gets here: there is no verdict to recover
+            print("❌ Judge analysis error: response is not valid JSON (truncated?)")
+            return _analysis_error("Judge response was not valid JSON (truncated)")
+    
+    def _extract_agreement_terms(
+        self,
         messages: List[Dict],
         scenario_type: str,
         agent_a_secrets: Dict,
         agent_b_secrets: Dict
     ) -> Dict[str, Any]:
         """Extract agreed-upon terms from the conversation"""
+        if scenario_type != "price_negotiation":
+            return {}
+        
         terms = {}
         
-        if scenario_type == "price_negotiation":
-            # Look for price mentions in the last few messages
+        # One pass over the last 6 messages, newest first. An agreement
+        # message with a dollar amount wins outright; otherwise the newest
+        # agreement message (last 4 only) with a plausible number is used
+        # (indexes walk the transcript in place, no slice is copied)
+        fallback_price = None
+        fallback_start = len(messages) - 4
+        
+        for index in range(len(messages) - 1, max(len(messages) - 6, 0) - 1, -1):
+            message = messages[index].get("message", "")
+            
+            # Both checks below need a number, so skip digit-free messages
+            # (one C-level scan instead of up to five full-message regexes)
+            if not _DIGIT_RE.search(message):
+                continue
+            
             # Check for explicit agreement with price
-            for msg in reversed(messages[-6:]):  # Check last 6 messages
-                message = msg.get("message", "")
-                
-                # Look for dollar amounts
-                price_pattern = r'\$(\d+(?:\.\d{2})?)'
-                prices = re.findall(price_pattern, message)
-                
+            if _AGREEMENT_RE.search(message):
+                prices = _DOLLAR_PRICE_RE.findall(message)
                 if prices:
-                    # Check if this message contains agreement language
-                    msg_lower = message.lower()
-                    if any(agree in msg_lower for agree in [
-                        "deal", "accept", "agree", "sold", "take it"
-                    ]):
-                        try:
-                            terms["price"] = float(prices[-1])
-                            break
-                        except ValueError:
-                            continue
+                    terms["price"] = float(prices[-1])
+                    return terms
             
-            # If no explicit price found, look for numbers in context of agreement
-            if "price" not in terms:
-                for msg in reversed(messages[-4:]):
-                    message = msg.get("message", "")
-                    msg_lower = message.lower()
-                    
-                    if any(agree in msg_lower for agree in [
-                        "deal", "accept", "agree", "sold", "finalize"
-                    ]):
-                        # Look for prices in context (with $ or words like "at" or "for")
-                        # Avoid matching years or model numbers
-                        context_prices = re.findall(r'(?:at|for|of|price|pay|offer)\s+\$?(\d{3,4})\b', message, re.IGNORECASE)
-                        
-                        if context_prices:
-                            try:
-                                potential_price = float(context_prices[-1])
-                                # Check if it's in reasonable range
-                                if 100 <= potential_price <= 10000:
-                                    terms["price"] = potential_price
-                                    break
-                            except ValueError:
-                                continue
-                        else:
-                            # If no context price found, try all numbers but exclude "2018" etc
-                            all_numbers = re.findall(r'\b(\d{3,4})\b', message)
-                            # Filter out year-like numbers (2000-2030 range)
-                            filtered_numbers = [n for n in all_numbers if not (2000 <= int(n) <= 2030)]
-                            if filtered_numbers:
-                                try:
-                                    potential_price = float(filtered_numbers[-1])
-                                    if 100 <= potential_price <= 10000:
-                                        terms["price"] = potential_price
-                                        break
-                                except ValueError:
-                                    continue
+            # Look for numbers in context of agreement
+            if fallback_price is None and index >= fallback_start and _FINAL_AGREEMENT_RE.search(message):
+                # Look for prices in context (with $ or words like "at" or "for")
+                # Avoid matching years or model numbers
+                candidates = _CONTEXT_PRICE_RE.findall(message)
+                if not candidates:
+                    # If no context price found, try all numbers but exclude "2018" etc
+                    # Filter out year-like numbers (2000-2030 range)
+                    candidates = [n for n in _BARE_NUMBER_RE.findall(message) if not (2000 <= int(n) <= 2030)]
+                
+                if candidates:
+                    potential_price = float(candidates[-1])
+                    # Check if it's in reasonable range
+                    if 100 <= potential_price <= 10000:
+                        fallback_price = potential_price
+        
+        if fallback_price is not None:
+            terms["price"] = fallback_price
         
         return terms
@@ -0,0 +1,99 @@
+"""
+Shared LLM Clients
+Connection-pooled HTTP clients handed to the OpenAI/Anthropic SDKs so every
+agent reuses the same warm TLS connections instead of opening its own, plus
+shared SDK client singletons for components that need no per-instance client
+"""
+
+import importlib
+from typing import Any, Dict
+from config.config import TIMEOUT_SECONDS, OPENAI_API_KEY, ANTHROPIC_API_KEY
+
+# Connection pool sized for many concurrent negotiations
+MAX_KEEPALIVE_CONNECTIONS = 64
+MAX_CONNECTIONS = 128
+
+
+def _http2_available() -> bool:
+    """HTTP/2 in httpx needs the optional 'h2' package"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _build_pooled_client(sdk: Any, client_cls) -> Any:
+    """
+    Build a pooled client from an SDK's DefaultHttpxClient class
+
+    The SDKs reject clients from a different httpx distribution (httpx vs
+    httpx2), so the limits are built with the Limits type of the SDK's own
+    public DEFAULT_CONNECTION_LIMITS and passed through DefaultHttpxClient.
+
+    Args:
+        sdk: Provider SDK module (openai / anthropic)
+        client_cls: SDK DefaultHttpxClient or DefaultAsyncHttpxClient class
+
+    Returns:
+        HTTP client instance accepted by that SDK
+    """
+    limits = type(sdk.DEFAULT_CONNECTION_LIMITS)(
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        max_connections=MAX_CONNECTIONS
+    )
+    return client_cls(
+        http2=_http2_available(),
+        limits=limits,
+        timeout=TIMEOUT_SECONDS
+    )
+
+
+# Global client instances, keyed by provider ("openai" / "anthropic")
+_http_clients: Dict[str, Any] = {}
+_async_http_clients: Dict[str, Any] = {}
+
+
+def get_http_client(provider: str) -> Any:
+    """Get or create the shared (sync) HTTP client singleton for a provider SDK"""
+    if provider not in _http_clients:
+        sdk = importlib.import_module(provider)
+        _http_clients[provider] = _build_pooled_client(sdk, sdk.DefaultHttpxClient)
+    return _http_clients[provider]
+
+
+def get_async_http_client(provider: str) -> Any:
+    """Get or create the shared async HTTP client singleton for a provider SDK"""
+    if provider not in _async_http_clients:
+        sdk = importlib.import_module(provider)
+        _async_http_clients[provider] = _build_pooled_client(sdk, sdk.DefaultAsyncHttpxClient)
+    return _async_http_clients[provider]
+
+
+# Global SDK client instances, keyed by provider
+_llm_clients: Dict[str, Any] = {}
+_async_llm_clients: Dict[str, Any] = {}
+
+
+def get_llm_client(provider: str) -> Any:
+    """Get or create the shared (sync) OpenAI/Anthropic client singleton"""
+    if provider not in _llm_clients:
+        if provider == "openai":
+            from openai import OpenAI
+            _llm_clients[provider] = OpenAI(api_key=OPENAI_API_KEY, http_client=get_http_client(provider))
+        else:
+            from anthropic import Anthropic
+            _llm_clients[provider] = Anthropic(api_key=ANTHROPIC_API_KEY, http_client=get_http_client(provider))
+    return _llm_clients[provider]
+
+
+def get_async_llm_client(provider: str) -> Any:
+    """Get or create the shared AsyncOpenAI/AsyncAnthropic client singleton"""
+    if provider not in _async_llm_clients:
+        if provider == "openai":
+            from openai import AsyncOpenAI
+            _async_llm_clients[provider] = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=get_async_http_client(provider))
+        else:
+            from anthropic import AsyncAnthropic
+            _async_llm_clients[provider] = AsyncAnthropic(api_key=ANTHROPIC_API_KEY, http_client=get_async_http_client(provider))
+    return _async_llm_clients[provider]
@@ -0,0 +1,77 @@
+"""
+Semantic Response Cache
+Reuses a Judge verdict when a new round is a near-paraphrase of one already
+judged ("I accept $700" vs "Deal at $700!"), using sentence embeddings
+"""
+
+from typing import Dict, List, Optional
+import threading
+import numpy as np
+
+
+class SemanticCache:
+    """Nearest-neighbour cache over normalized sentence embeddings"""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", threshold: float = 0.93):
+        """
+        Initialize the semantic cache
+
+        Args:
+            model_name: Sentence-BERT model for embeddings
+            threshold: Minimum cosine similarity for a cache hit
+        """
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.threshold = threshold
+
+        # Per-namespace embeddings (stacked lazily) and cached response texts
+        self._vectors: Dict[str, List[np.ndarray]] = {}
+        self._matrices: Dict[str, np.ndarray] = {}
+        self._results: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()  # Judges may run in worker threads
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a text as a unit-length vector"""
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+    def lookup(self, namespace: str, vector: np.ndarray, threshold: float = None) -> Optional[str]:
+        """
+        Find the cached response closest to an embedding
+
+        Args:
+            namespace: Only entries from this namespace are considered
+            vector: Normalized query embedding
+            threshold: Minimum cosine similarity (defaults to the cache's own)
+
+        Returns:
+            Cached response text, or None if nothing is similar enough
+        """
+        with self._lock:
+            results = self._results.get(namespace)
+            if not results:
+                return None
+
+            matrix = self._matrices.get(namespace)
+            if matrix is None:
+                matrix = self._matrices[namespace] = np.vstack(self._vectors[namespace])
+
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= (self.threshold if threshold is None else threshold):
+                return results[best]
+            return None
+
+    def add(self, namespace: str, vector: np.ndarray, result: str):
+        """
+        Store a response under an embedding
+
+        Args:
+            namespace: Namespace of the entry
+            vector: Normalized embedding of the request
+            result: Response text to reuse on later hits
+        """
+        with self._lock:
+            self._vectors.setdefault(namespace, []).append(vector)
+            self._results.setdefault(namespace, []).append(result)
+            self._matrices.pop(namespace, None)
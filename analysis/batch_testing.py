@@ -7,18 +7,66 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from simulation import NegotiationEngine, run_negotiation_realtime
-from personas.persona_configs import PersonaConfigs
-from utils.scenario_loader import ScenarioLoader
-from datetime import datetime
+from config.config import BATCH_MAX_CONCURRENT, BATCH_USE_PROCESSES
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Optional
+import asyncio
 import time
+import numpy as np
+
+# The simulation package pulls in the agents, LLM SDKs and MongoDB client,
+# so it is only imported once a batch actually runs
+if TYPE_CHECKING:
+    from simulation import NegotiationEngine
+
+
+def _run_one(
+    engine: "NegotiationEngine",
+    scenario_name: str,
+    scenario_type: str,
+    persona_a: str,
+    persona_b: str,
+    max_rounds: int
+) -> Optional[Dict[str, Any]]:
+    """Run one negotiation to completion and return its final results (None if there are none)"""
+    from simulation import run_negotiation_realtime
+    
+    # Create agents
+    agent_a, agent_b = engine.create_agents(
+        scenario_name=scenario_name,
+        agent_a_persona=persona_a,
+        agent_b_persona=persona_b
+    )
+    
+    # Run negotiation (consume generator)
+    for update in run_negotiation_realtime(agent_a, agent_b, max_rounds, scenario_type):
+        if update.get("type") == "complete":
+            return update
+    return None
+
+
+def _run_one_in_process(
+    scenario_name: str,
+    scenario_type: str,
+    persona_a: str,
+    persona_b: str,
+    max_rounds: int
+) -> Optional[Dict[str, Any]]:
+    """_run_one for a worker process, which builds its own NegotiationEngine"""
+    from simulation import NegotiationEngine
+    
+    engine = NegotiationEngine(max_rounds=max_rounds)
+    return _run_one(engine, scenario_name, scenario_type, persona_a, persona_b, max_rounds)
 
 
 def run_batch_negotiations(
     scenario_name: str,
     persona_pairs: list,
     runs_per_pair: int = 5,
-    max_rounds: int = 10
+    max_rounds: int = 10,
+    max_concurrent: int = None,
+    use_processes: bool = None
 ):
     """
     Run multiple negotiations for statistical analysis
@@ -28,11 +76,51 @@ def run_batch_negotiations(
         persona_pairs: List of (persona_a, persona_b) tuples
         runs_per_pair: Number of negotiations to run per persona pair
         max_rounds: Maximum rounds per negotiation
+        max_concurrent: Negotiations running at once (default BATCH_MAX_CONCURRENT)
+        use_processes: Run negotiations in worker processes (default BATCH_USE_PROCESSES)
+    """
+    return asyncio.run(run_batch_negotiations_async(
+        scenario_name, persona_pairs, runs_per_pair, max_rounds, max_concurrent, use_processes
+    ))
+
+
+async def run_batch_negotiations_async(
+    scenario_name: str,
+    persona_pairs: list,
+    runs_per_pair: int = 5,
+    max_rounds: int = 10,
+    max_concurrent: int = None,
+    use_processes: bool = None
+):
     """
+    Async version of run_batch_negotiations
+    
+    Negotiations are independent and almost all of their time is spent waiting
+    on the LLM APIs, so up to max_concurrent of them run at once (each in a
+    worker thread, as the realtime negotiation loop is synchronous). With
+    use_processes they run in a pool of worker processes instead, so the
+    CPU-bound analysis at the end of each negotiation runs in parallel too.
+    
+    Args:
+        scenario_name: Name of the scenario to use
+        persona_pairs: List of (persona_a, persona_b) tuples
+        runs_per_pair: Number of negotiations to run per persona pair
+        max_rounds: Maximum rounds per negotiation
+        max_concurrent: Negotiations running at once (default BATCH_MAX_CONCURRENT)
+        use_processes: Run negotiations in worker processes (default BATCH_USE_PROCESSES)
+        
+    Returns:
+        List of per-run summaries, ordered by persona pair and run
+    """
+    from simulation import NegotiationEngine
+    from utils.scenario_loader import ScenarioLoader
+    
     engine = NegotiationEngine(max_rounds=max_rounds)
     scenario_loader = ScenarioLoader()
     scenario = scenario_loader.get_scenario(scenario_name)
     scenario_type = scenario.get("type", "price_negotiation") if scenario else "price_negotiation"
+    max_concurrent = max_concurrent or BATCH_MAX_CONCURRENT
+    use_processes = BATCH_USE_PROCESSES if use_processes is None else use_processes
     
     total_runs = len(persona_pairs) * runs_per_pair
     completed = 0
@@ -45,38 +133,32 @@ def run_batch_negotiations(
     print(f"Runs per pair: {runs_per_pair}")
     print(f"Total negotiations: {total_runs}")
     print(f"Max rounds: {max_rounds}")
+    print(f"Concurrent negotiations: {max_concurrent} ({'processes' if use_processes else 'threads'})")
     print("=" * 70)
     print()
     
-    results_summary = []
+    semaphore = asyncio.Semaphore(max_concurrent)
+    executor = ProcessPoolExecutor(max_workers=max_concurrent) if use_processes else None
+    loop = asyncio.get_running_loop()
     start_time = time.time()
     
-    for persona_a, persona_b in persona_pairs:
-        print(f"\n📊 Testing: {persona_a} vs {persona_b}")
-        print("-" * 50)
-        
-        for run in range(1, runs_per_pair + 1):
-            completed += 1
-            print(f"  Run {run}/{runs_per_pair}... ", end="", flush=True)
-            
+    async def run_one(persona_a: str, persona_b: str, run: int) -> Optional[Dict[str, Any]]:
+        nonlocal completed
+        summary = None
+        async with semaphore:
             try:
-                # Create agents
-                agent_a, agent_b = engine.create_agents(
-                    scenario_name=scenario_name,
-                    agent_a_persona=persona_a,
-                    agent_b_persona=persona_b
-                )
-                
-                # Run negotiation (consume generator)
-                results = None
-                for update in run_negotiation_realtime(agent_a, agent_b, max_rounds, scenario_type):
-                    if update.get("type") == "complete":
-                        results = update
-                        break
+                if executor is not None:
+                    results = await loop.run_in_executor(
+                        executor, _run_one_in_process, scenario_name, scenario_type, persona_a, persona_b, max_rounds
+                    )
+                else:
+                    results = await asyncio.to_thread(
+                        _run_one, engine, scenario_name, scenario_type, persona_a, persona_b, max_rounds
+                    )
                 
                 if results:
                     # Store summary
-                    results_summary.append({
+                    summary = {
                         "persona_a": persona_a,
                         "persona_b": persona_b,
                         "run": run,
@@ -84,26 +166,49 @@ def run_batch_negotiations(
                         "rounds": results.get("rounds", 0),
                         "utility_a": results.get("utility_a"),
                         "utility_b": results.get("utility_b"),
-                        "final_price": results.get("agreement_terms", {}).get("price") if results.get("agreement_terms") else None
-                    })
+                        "final_price": results.get("agreement_terms", {}).get("price") if results.get("agreement_terms") else None,
+                        "judge_error": results.get("judge_error")
+                    }
                     
-                    status = "✅ Agreement" if results.get("agreement_reached") else "❌ No deal"
+                    if results.get("judge_error"):
+                        status = "⚠️ Judge error (not counted)"
+                    else:
+                        status = "✅ Agreement" if results.get("agreement_reached") else "❌ No deal"
                     rounds = results.get("rounds", 0)
-                    print(f"{status} in {rounds} rounds")
+                    outcome = f"{status} in {rounds} rounds"
                 else:
-                    print("❌ Error: No results")
+                    outcome = "❌ Error: No results"
                     
             except Exception as e:
-                print(f"❌ Error: {str(e)}")
-            
-            # Progress indicator
-            progress = (completed / total_runs) * 100
-            elapsed = time.time() - start_time
-            estimated_total = (elapsed / completed) * total_runs
-            remaining = estimated_total - elapsed
-            
-            print(f"      Progress: {completed}/{total_runs} ({progress:.1f}%) - "
-                  f"Elapsed: {elapsed:.1f}s - Remaining: ~{remaining:.1f}s")
+                outcome = f"❌ Error: {str(e)}"
+        
+        completed += 1
+        
+        # Progress indicator
+        progress = (completed / total_runs) * 100
+        elapsed = time.time() - start_time
+        estimated_total = (elapsed / completed) * total_runs
+        remaining = estimated_total - elapsed
+        
+        # One line per run: other output (Judge stats) interleaves with it
+        print(f"  📊 [{completed}/{total_runs} {progress:.0f}% | {elapsed:.0f}s, ~{remaining:.0f}s left] "
+              f"{persona_a} vs {persona_b} - Run {run}/{runs_per_pair}: {outcome}")
+        return summary
+    
+    try:
+        summaries = await asyncio.gather(*(
+            run_one(persona_a, persona_b, run)
+            for persona_a, persona_b in persona_pairs
+            for run in range(1, runs_per_pair + 1)
+        ))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    results_summary = [summary for summary in summaries if summary is not None]
+    # Runs the Judge failed to analyse have no outcome: keep them in the returned
+    # summary (flagged by judge_error) but leave them out of the statistics
+    judged = [summary for summary in results_summary if not summary["judge_error"]]
+    judge_errors = len(results_summary) - len(judged)
     
     # Print summary
     total_time = time.time() - start_time
@@ -113,18 +218,25 @@ def run_batch_negotiations(
     print(f"Total negotiations: {completed}")
     print(f"Total time: {total_time:.1f}s ({total_time/60:.1f} minutes)")
     print(f"Avg time per negotiation: {total_time/completed:.1f}s")
+    if judge_errors:
+        print(f"⚠️ Judge errors: {judge_errors} (not saved, excluded from statistics)")
     print()
     
-    # Calculate statistics
-    agreements = sum(1 for r in results_summary if r["agreement_reached"])
-    agreement_rate = (agreements / len(results_summary)) * 100 if results_summary else 0
+    # Calculate statistics over columns built in one pass (rows grouped by persona pair)
+    agreed = np.array([r["agreement_reached"] for r in judged], dtype=bool)
+    rounds = np.array([r["rounds"] for r in judged], dtype=float)
+    pair_rows = defaultdict(list)
+    for row, r in enumerate(judged):
+        pair_rows[(r["persona_a"], r["persona_b"])].append(row)
+    
+    agreements = int(agreed.sum())
+    agreement_rate = agreed.mean() * 100 if judged else 0
     
-    avg_rounds = sum(r["rounds"] for r in results_summary) / len(results_summary) if results_summary else 0
+    avg_rounds = rounds.mean() if judged else 0
     
-    successful_negotiations = [r for r in results_summary if r["agreement_reached"]]
-    avg_rounds_to_agreement = sum(r["rounds"] for r in successful_negotiations) / len(successful_negotiations) if successful_negotiations else 0
+    avg_rounds_to_agreement = rounds[agreed].mean() if agreements else 0
     
-    print(f"✅ Agreement rate: {agreement_rate:.1f}% ({agreements}/{len(results_summary)})")
+    print(f"✅ Agreement rate: {agreement_rate:.1f}% ({agreements}/{len(judged)})")
     print(f"📊 Average rounds: {avg_rounds:.1f}")
     print(f"📊 Average rounds to agreement: {avg_rounds_to_agreement:.1f}")
     print()
@@ -133,13 +245,11 @@ def run_batch_negotiations(
     print("Per-Persona Statistics:")
     print("-" * 50)
     for persona_a, persona_b in persona_pairs:
-        pair_results = [r for r in results_summary 
-                       if r["persona_a"] == persona_a and r["persona_b"] == persona_b]
+        rows = pair_rows.get((persona_a, persona_b))
         
-        if pair_results:
-            pair_agreements = sum(1 for r in pair_results if r["agreement_reached"])
-            pair_agreement_rate = (pair_agreements / len(pair_results)) * 100
-            pair_avg_rounds = sum(r["rounds"] for r in pair_results) / len(pair_results)
+        if rows:
+            pair_agreement_rate = agreed[rows].mean() * 100
+            pair_avg_rounds = rounds[rows].mean()
             
             print(f"  {persona_a} vs {persona_b}:")
             print(f"    Agreement rate: {pair_agreement_rate:.1f}%")
@@ -5,12 +5,76 @@ Academic analysis: agreement rate, rounds to convergence, utility scores, langua
 
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.mongodb_client import get_mongodb_client
 from analysis.language_metrics import LanguageMetrics
-from typing import Dict, List, Any
-import statistics
+from config.config import METRICS_SERVER_SIDE, METRICS_LANGUAGE_WORKERS, METRICS_PARALLEL_MIN_NEGOTIATIONS
+from typing import Dict, Iterator, List, Any, Optional
+import numpy as np
+
+
+# Fields the metrics read. Message prompts, Judge analyses and qualitative
+# metrics make up most of each document and are never sent back
+METRICS_PROJECTION = {
+    "_id": 0,
+    "agreement_reached": 1,
+    "rounds": 1,
+    "utility_a": 1,
+    "utility_b": 1,
+    "agent_a_info.persona": 1,
+    "agent_b_info.persona": 1,
+    "messages.type": 1,
+    "messages.agent": 1,
+    "messages.message": 1
+}
+
+# Fields the language metrics read, when the rest is aggregated server-side
+LANGUAGE_PROJECTION = {
+    "_id": 0,
+    "messages.type": 1,
+    "messages.agent": 1,
+    "messages.message": 1
+}
+
+# Per-agent language metrics averaged (and summed) across negotiations
+LANGUAGE_MEAN_KEYS = [
+    "avg_words_per_message",
+    "avg_word_length",
+    "avg_sentence_length",
+    # Vocabulary diversity (using lexicalrichness library)
+    "avg_vocabulary_richness",
+    "avg_root_ttr",
+    "avg_corrected_ttr",
+    # Readability (academic standard - Flesch metrics)
+    "avg_flesch_reading_ease",
+    "avg_flesch_kincaid_grade"
+]
+LANGUAGE_TOTAL_KEYS = ["total_questions", "total_exclamations", "total_dollar_mentions"]
+
+
+def _median(values: np.ndarray) -> float:
+    """
+    Median by selection (np.partition, O(n)) instead of a full sort
+    
+    Args:
+        values: Non-empty 1-D array
+        
+    Returns:
+        Median value
+    """
+    # Below a few dozen values np.median's sort is as fast and has less overhead
+    if values.size < 64:
+        return float(np.median(values))
+    
+    middle = values.size // 2
+    if values.size % 2:
+        return float(np.partition(values, middle)[middle])
+    
+    # Even size: partitioning around both middle positions places each of them
+    partitioned = np.partition(values, (middle - 1, middle))
+    return float((partitioned[middle - 1] + partitioned[middle]) / 2)
 
 
 class MetricsCalculator:
@@ -19,13 +83,52 @@ class MetricsCalculator:
     def __init__(self):
         self.mongo_client = get_mongodb_client()
         self.language_analyzer = LanguageMetrics()
+        
+        # Fetched negotiations, keyed by (limit, projected fields), with the
+        # collection size they were fetched at
+        self._cache: Dict[tuple, tuple] = {}
+    
+    def invalidate_cache(self):
+        """Forget the negotiations fetched by earlier calculate_all_metrics calls"""
+        self._cache.clear()
     
-    def calculate_all_metrics(self, limit: int = None) -> Dict[str, Any]:
+    def _get_negotiations(self, limit: int = None, projection: Dict[str, Any] = None) -> List[Dict]:
+        """
+        Get negotiations from MongoDB, reusing an earlier fetch of the same ones
+        
+        A cached fetch is reused while the collection size is unchanged, so
+        negotiations saved since then are picked up.
+        
+        Args:
+            limit: Maximum number of negotiations (None = all)
+            projection: Fields to return
+            
+        Returns:
+            List of negotiation documents
+        """
+        key = (limit, tuple(sorted(projection or {})))
+        try:
+            size = self.mongo_client.negotiations_collection.estimated_document_count()
+        except Exception:
+            size = None
+        
+        cached = self._cache.get(key)
+        if cached is not None and size is not None and cached[0] == size:
+            print("♻️  Reusing negotiations fetched earlier")
+            return cached[1]
+        
+        negotiations = self.mongo_client.get_all_negotiations(limit=limit, projection=projection)
+        if negotiations and size is not None:
+            self._cache[key] = (size, negotiations)
+        return negotiations
+    
+    def calculate_all_metrics(self, limit: int = None, server_side: bool = None) -> Dict[str, Any]:
         """
         Calculate all academic metrics from MongoDB data
         
         Args:
             limit: Maximum number of negotiations to analyze (None = all)
+            server_side: Aggregate the numeric metrics in MongoDB (default METRICS_SERVER_SIDE)
             
         Returns:
             Dictionary with all calculated metrics
@@ -35,9 +138,17 @@ class MetricsCalculator:
         print("=" * 70)
         print()
         
+        server_side = METRICS_SERVER_SIDE if server_side is None else server_side
+        if server_side:
+            print("📥 Aggregating negotiations in MongoDB...")
+            groups = self._aggregate_server_side(limit)
+            if groups is not None:
+                return self._calculate_all_metrics_from_groups(groups, limit)
+            print("⚠️  Falling back to client-side aggregation")
+        
         # Retrieve negotiations from MongoDB
         print("📥 Retrieving negotiations from MongoDB...")
-        negotiations = self.mongo_client.get_all_negotiations(limit=limit)
+        negotiations = self._get_negotiations(limit=limit, projection=METRICS_PROJECTION)
         
         if not negotiations:
             print("❌ No negotiations found in database!")
@@ -46,14 +157,15 @@ class MetricsCalculator:
         print(f"✅ Found {len(negotiations)} negotiations")
         print()
         
-        # Calculate metrics
+        # Calculate metrics (the scalar fields are read into arrays once, for all of them)
+        columns = self._extract_scalar_arrays(negotiations)
         metrics = {
             "total_negotiations": len(negotiations),
-            "agreement_metrics": self._calculate_agreement_metrics(negotiations),
-            "rounds_metrics": self._calculate_rounds_metrics(negotiations),
-            "utility_metrics": self._calculate_utility_metrics(negotiations),
+            "agreement_metrics": self._calculate_agreement_metrics(columns),
+            "rounds_metrics": self._calculate_rounds_metrics(columns),
+            "utility_metrics": self._calculate_utility_metrics(columns),
             "language_metrics": self._calculate_language_metrics(negotiations),
-            "persona_comparison": self._calculate_persona_metrics(negotiations)
+            "persona_comparison": self._calculate_persona_metrics(columns)
         }
         
         # Print results
@@ -61,137 +173,316 @@ class MetricsCalculator:
         
         return metrics
     
-    def _calculate_agreement_metrics(self, negotiations: List[Dict]) -> Dict[str, Any]:
-        """Calculate agreement rate"""
-        agreements = [n for n in negotiations if n.get("agreement_reached", False)]
-        agreement_rate = (len(agreements) / len(negotiations)) * 100
+    def _aggregate_server_side(self, limit: int = None) -> Optional[List[Dict]]:
+        """
+        Group negotiations by persona pairing in a MongoDB pipeline
+        
+        Each group carries its counts and sums plus the bare rounds/utility
+        values the medians need, so no transcripts cross the network.
+        
+        Args:
+            limit: Only aggregate the newest negotiations (None = all)
+            
+        Returns:
+            One document per persona pairing (most recent pairing first), or None if the pipeline failed
+        """
+        agreed = {"$eq": ["$agreement_reached", True]}
+        rounds = {"$ifNull": ["$rounds", 0]}
+        
+        def push_if(condition, value):
+            return {"$push": {"$cond": [condition, value, "$$REMOVE"]}}
+        
+        def has(field):
+            return {"$ne": [{"$ifNull": [field, None]}, None]}
+        
+        # Newest first, like get_all_negotiations: groups (and their pushed
+        # values) then come out in the order the client-side path sees them
+        pipeline = [{"$sort": {"timestamp": -1}}]
+        if limit is not None:
+            pipeline.append({"$limit": limit})
+        pipeline.append({
+            "$group": {
+                "_id": {
+                    "persona_a": {"$ifNull": ["$agent_a_info.persona", "Unknown"]},
+                    "persona_b": {"$ifNull": ["$agent_b_info.persona", "Unknown"]}
+                },
+                "latest": {"$first": "$timestamp"},
+                "count": {"$sum": 1},
+                "agreements": {"$sum": {"$cond": [agreed, 1, 0]}},
+                "rounds": {"$push": rounds},
+                "agreement_rounds": push_if(agreed, rounds),
+                "utilities_a": push_if(has("$utility_a"), "$utility_a"),
+                "utilities_b": push_if(has("$utility_b"), "$utility_b"),
+                "agreement_utilities_a": push_if({"$and": [agreed, has("$utility_a")]}, "$utility_a"),
+                "agreement_utilities_b": push_if({"$and": [agreed, has("$utility_b")]}, "$utility_b")
+            }
+        })
+        pipeline.append({"$sort": {"latest": -1}})
+        
+        try:
+            return list(self.mongo_client.negotiations_collection.aggregate(pipeline, allowDiskUse=True))
+        except Exception as e:
+            print(f"❌ Error aggregating negotiations: {e}")
+            return None
+    
+    def _calculate_all_metrics_from_groups(self, groups: List[Dict], limit: int = None) -> Dict[str, Any]:
+        """
+        Calculate all metrics from _aggregate_server_side groups
+        
+        Args:
+            groups: Persona pairing groups from the aggregation pipeline
+            limit: Maximum number of negotiations to analyze (None = all)
+            
+        Returns:
+            Dictionary with all calculated metrics
+        """
+        total = sum(group["count"] for group in groups)
+        if not total:
+            print("❌ No negotiations found in database!")
+            return {}
+        
+        print(f"✅ Found {total} negotiations")
+        print()
+        
+        def concat(field):
+            return np.array([value for group in groups for value in group[field]], dtype=float)
+        
+        agreements = sum(group["agreements"] for group in groups)
+        
+        # Only the transcripts are still needed, for the language metrics
+        print("📥 Retrieving transcripts from MongoDB...")
+        transcripts = self._get_negotiations(limit=limit, projection=LANGUAGE_PROJECTION)
+        
+        persona_stats = {}
+        for group in groups:
+            count = group["count"]
+            total_rounds = int(sum(group["rounds"]))
+            persona_stats[f"{group['_id']['persona_a']} vs {group['_id']['persona_b']}"] = {
+                "count": count,
+                "agreements": group["agreements"],
+                "total_rounds": total_rounds,
+                "utilities_a": group["utilities_a"],
+                "utilities_b": group["utilities_b"],
+                "agreement_rate": (group["agreements"] / count) * 100,
+                "avg_rounds": total_rounds / count,
+                "avg_utility_a": float(np.mean(group["utilities_a"])) if group["utilities_a"] else 0,
+                "avg_utility_b": float(np.mean(group["utilities_b"])) if group["utilities_b"] else 0
+            }
+        
+        metrics = {
+            "total_negotiations": total,
+            "agreement_metrics": {
+                "total_agreements": agreements,
+                "total_disagreements": total - agreements,
+                "agreement_rate_percent": (agreements / total) * 100
+            },
+            "rounds_metrics": self._summarize_rounds(concat("rounds"), concat("agreement_rounds")),
+            "utility_metrics": self._summarize_utilities(concat("agreement_utilities_a"), concat("agreement_utilities_b")),
+            "language_metrics": self._calculate_language_metrics(transcripts),
+            "persona_comparison": persona_stats
+        }
+        
+        # Print results
+        self._print_metrics(metrics)
+        
+        return metrics
+    
+    @staticmethod
+    def _extract_scalar_arrays(negotiations: List[Dict]) -> Dict[str, Any]:
+        """
+        Read the scalar fields of every negotiation into arrays in a single pass
+        
+        Args:
+            negotiations: Negotiation documents
+            
+        Returns:
+            Dictionary of per-negotiation columns: "rounds", "agreed",
+            "utility_a"/"utility_b" (NaN when missing) and "pair_codes"
+            (index into "pairs", the distinct (persona_a, persona_b) pairings)
+        """
+        count = len(negotiations)
+        pair_table = {}
+        pair_codes = np.empty(count, dtype=np.int64)
+        rounds = np.empty(count, dtype=np.int64)
+        agreed = np.empty(count, dtype=bool)
+        utilities_a = np.empty(count, dtype=float)
+        utilities_b = np.empty(count, dtype=float)
+        
+        for i, negotiation in enumerate(negotiations):
+            persona_a = negotiation.get("agent_a_info", {}).get("persona", "Unknown")
+            persona_b = negotiation.get("agent_b_info", {}).get("persona", "Unknown")
+            pair_codes[i] = pair_table.setdefault((persona_a, persona_b), len(pair_table))
+            
+            rounds[i] = negotiation.get("rounds", 0)
+            agreed[i] = bool(negotiation.get("agreement_reached", False))
+            utility_a = negotiation.get("utility_a")
+            utility_b = negotiation.get("utility_b")
+            utilities_a[i] = np.nan if utility_a is None else utility_a
+            utilities_b[i] = np.nan if utility_b is None else utility_b
         
         return {
-            "total_agreements": len(agreements),
-            "total_disagreements": len(negotiations) - len(agreements),
+            "pairs": list(pair_table),
+            "pair_codes": pair_codes,
+            "rounds": rounds,
+            "agreed": agreed,
+            "utility_a": utilities_a,
+            "utility_b": utilities_b
+        }
+    
+    def _calculate_agreement_metrics(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate agreement rate from _extract_scalar_arrays columns"""
+        count = columns["agreed"].size
+        agreements = int(np.count_nonzero(columns["agreed"]))
+        agreement_rate = (agreements / count) * 100
+        
+        return {
+            "total_agreements": agreements,
+            "total_disagreements": count - agreements,
             "agreement_rate_percent": agreement_rate
         }
     
-    def _calculate_rounds_metrics(self, negotiations: List[Dict]) -> Dict[str, Any]:
-        """Calculate rounds to convergence"""
-        all_rounds = [n.get("rounds", 0) for n in negotiations]
+    def _calculate_rounds_metrics(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate rounds to convergence from _extract_scalar_arrays columns"""
+        all_rounds = columns["rounds"]
         
         # Rounds for successful agreements only
-        agreement_rounds = [n.get("rounds", 0) for n in negotiations 
-                           if n.get("agreement_reached", False)]
-        
+        return self._summarize_rounds(all_rounds, all_rounds[columns["agreed"]])
+    
+    @staticmethod
+    def _summarize_rounds(all_rounds: np.ndarray, agreement_rounds: np.ndarray) -> Dict[str, Any]:
+        """Reduce rounds arrays (all negotiations / agreements only) to the rounds metrics"""
         return {
-            "avg_rounds_all": statistics.mean(all_rounds) if all_rounds else 0,
-            "median_rounds_all": statistics.median(all_rounds) if all_rounds else 0,
-            "min_rounds": min(all_rounds) if all_rounds else 0,
-            "max_rounds": max(all_rounds) if all_rounds else 0,
-            "avg_rounds_to_agreement": statistics.mean(agreement_rounds) if agreement_rounds else 0,
-            "median_rounds_to_agreement": statistics.median(agreement_rounds) if agreement_rounds else 0
+            "avg_rounds_all": float(all_rounds.mean()) if all_rounds.size else 0,
+            "median_rounds_all": _median(all_rounds) if all_rounds.size else 0,
+            "min_rounds": int(all_rounds.min()) if all_rounds.size else 0,
+            "max_rounds": int(all_rounds.max()) if all_rounds.size else 0,
+            "avg_rounds_to_agreement": float(agreement_rounds.mean()) if agreement_rounds.size else 0,
+            "median_rounds_to_agreement": _median(agreement_rounds) if agreement_rounds.size else 0
         }
     
-    def _calculate_utility_metrics(self, negotiations: List[Dict]) -> Dict[str, Any]:
-        """Calculate utility score statistics"""
+    def _calculate_utility_metrics(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate utility score statistics from _extract_scalar_arrays columns"""
         # Only for successful negotiations
-        successful = [n for n in negotiations if n.get("agreement_reached", False)]
-        
-        utilities_a = [n.get("utility_a") for n in successful if n.get("utility_a") is not None]
-        utilities_b = [n.get("utility_b") for n in successful if n.get("utility_b") is not None]
-        
+        agreed = columns["agreed"]
+        utilities_a = columns["utility_a"][agreed]
+        utilities_b = columns["utility_b"][agreed]
+        return self._summarize_utilities(utilities_a[~np.isnan(utilities_a)], utilities_b[~np.isnan(utilities_b)])
+    
+    @staticmethod
+    def _summarize_utilities(utilities_a: np.ndarray, utilities_b: np.ndarray) -> Dict[str, Any]:
+        """Reduce the utilities of successful negotiations to the utility metrics"""
         # Combined utilities
-        all_utilities = utilities_a + utilities_b
+        all_utilities = np.concatenate([utilities_a, utilities_b])
         
         return {
-            "agent_a_avg_utility": statistics.mean(utilities_a) if utilities_a else 0,
-            "agent_a_median_utility": statistics.median(utilities_a) if utilities_a else 0,
-            "agent_b_avg_utility": statistics.mean(utilities_b) if utilities_b else 0,
-            "agent_b_median_utility": statistics.median(utilities_b) if utilities_b else 0,
-            "combined_avg_utility": statistics.mean(all_utilities) if all_utilities else 0,
-            "combined_median_utility": statistics.median(all_utilities) if all_utilities else 0,
-            "utility_stdev": statistics.stdev(all_utilities) if len(all_utilities) > 1 else 0
+            "agent_a_avg_utility": float(utilities_a.mean()) if utilities_a.size else 0,
+            "agent_a_median_utility": _median(utilities_a) if utilities_a.size else 0,
+            "agent_b_avg_utility": float(utilities_b.mean()) if utilities_b.size else 0,
+            "agent_b_median_utility": _median(utilities_b) if utilities_b.size else 0,
+            "combined_avg_utility": float(all_utilities.mean()) if all_utilities.size else 0,
+            "combined_median_utility": _median(all_utilities) if all_utilities.size else 0,
+            "utility_stdev": float(all_utilities.std(ddof=1)) if all_utilities.size > 1 else 0
         }
     
-    def _calculate_language_metrics(self, negotiations: List[Dict]) -> Dict[str, Any]:
-        """Calculate language complexity metrics"""
-        all_agent_a_metrics = []
-        all_agent_b_metrics = []
-        
-        for negotiation in negotiations:
-            messages = negotiation.get("messages", [])
-            if messages:
-                transcript_metrics = self.language_analyzer.analyze_negotiation_transcript(messages)
-                all_agent_a_metrics.append(transcript_metrics["agent_a"])
-                all_agent_b_metrics.append(transcript_metrics["agent_b"])
-        
-        # Aggregate across all negotiations
-        def aggregate_language_metrics(metrics_list):
-            if not metrics_list:
-                return {}
+    def _calculate_language_metrics(self, negotiations: List[Dict], workers: int = None) -> Dict[str, Any]:
+        """
+        Calculate language complexity metrics
+        
+        Args:
+            negotiations: Negotiation documents (only "messages" is read)
+            workers: Worker processes for the transcripts (default METRICS_LANGUAGE_WORKERS, 1 = serial)
             
-            return {
-                "avg_words_per_message": statistics.mean([m["avg_words_per_message"] for m in metrics_list]),
-                "avg_word_length": statistics.mean([m["avg_word_length"] for m in metrics_list]),
-                "avg_sentence_length": statistics.mean([m["avg_sentence_length"] for m in metrics_list]),
-                
-                # Vocabulary diversity (using lexicalrichness library)
-                "avg_vocabulary_richness": statistics.mean([m["avg_vocabulary_richness"] for m in metrics_list]),
-                "avg_root_ttr": statistics.mean([m.get("avg_root_ttr", 0) for m in metrics_list]),
-                "avg_corrected_ttr": statistics.mean([m.get("avg_corrected_ttr", 0) for m in metrics_list]),
-                
-                # Readability (academic standard - Flesch metrics)
-                "avg_flesch_reading_ease": statistics.mean([m.get("avg_flesch_reading_ease", 0) for m in metrics_list]),
-                "avg_flesch_kincaid_grade": statistics.mean([m.get("avg_flesch_kincaid_grade", 0) for m in metrics_list]),
-                
-                # Linguistic features
-                "total_questions": sum([m["total_questions"] for m in metrics_list]),
-                "total_exclamations": sum([m["total_exclamations"] for m in metrics_list]),
-                "total_dollar_mentions": sum([m["total_dollar_mentions"] for m in metrics_list])
-            }
+        Returns:
+            Aggregated metrics per agent
+        """
+        transcripts = [n["messages"] for n in negotiations if n.get("messages")]
+        
+        if not transcripts:
+            return {"agent_a": {}, "agent_b": {}}
+        
+        # One preallocated (negotiations x metrics) row block per agent and kind,
+        # filled as each transcript's metrics arrive and reduced column-wise once
+        agents = ("agent_a", "agent_b")
+        means = {agent: np.empty((len(transcripts), len(LANGUAGE_MEAN_KEYS))) for agent in agents}
+        totals = {agent: np.empty((len(transcripts), len(LANGUAGE_TOTAL_KEYS)), dtype=np.int64) for agent in agents}
+        
+        for i, transcript_metrics in enumerate(self._iter_transcript_metrics(transcripts, workers)):
+            for agent in agents:
+                agent_metrics = transcript_metrics[agent]
+                means[agent][i] = [agent_metrics.get(key, 0) for key in LANGUAGE_MEAN_KEYS]
+                totals[agent][i] = [agent_metrics[key] for key in LANGUAGE_TOTAL_KEYS]
         
         return {
-            "agent_a": aggregate_language_metrics(all_agent_a_metrics),
-            "agent_b": aggregate_language_metrics(all_agent_b_metrics)
+            agent: {
+                **dict(zip(LANGUAGE_MEAN_KEYS, means[agent].mean(axis=0).tolist())),
+                # Linguistic features
+                **dict(zip(LANGUAGE_TOTAL_KEYS, totals[agent].sum(axis=0).tolist()))
+            }
+            for agent in agents
         }
     
-    def _calculate_persona_metrics(self, negotiations: List[Dict]) -> Dict[str, Any]:
-        """Calculate metrics by persona pairing"""
-        persona_stats = {}
+    def _iter_transcript_metrics(self, transcripts: List[List[Dict]], workers: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield analyze_negotiation_transcript results, in transcript order
         
-        for negotiation in negotiations:
-            agent_a_info = negotiation.get("agent_a_info", {})
-            agent_b_info = negotiation.get("agent_b_info", {})
-            
-            persona_a = agent_a_info.get("persona", "Unknown")
-            persona_b = agent_b_info.get("persona", "Unknown")
-            
-            pair_key = f"{persona_a} vs {persona_b}"
-            
-            if pair_key not in persona_stats:
-                persona_stats[pair_key] = {
-                    "count": 0,
-                    "agreements": 0,
-                    "total_rounds": 0,
-                    "utilities_a": [],
-                    "utilities_b": []
-                }
-            
-            persona_stats[pair_key]["count"] += 1
-            
-            if negotiation.get("agreement_reached", False):
-                persona_stats[pair_key]["agreements"] += 1
-            
-            persona_stats[pair_key]["total_rounds"] += negotiation.get("rounds", 0)
-            
-            if negotiation.get("utility_a") is not None:
-                persona_stats[pair_key]["utilities_a"].append(negotiation["utility_a"])
-            if negotiation.get("utility_b") is not None:
-                persona_stats[pair_key]["utilities_b"].append(negotiation["utility_b"])
-        
-        # Calculate aggregates
-        for pair_key, stats in persona_stats.items():
-            stats["agreement_rate"] = (stats["agreements"] / stats["count"]) * 100 if stats["count"] > 0 else 0
-            stats["avg_rounds"] = stats["total_rounds"] / stats["count"] if stats["count"] > 0 else 0
-            stats["avg_utility_a"] = statistics.mean(stats["utilities_a"]) if stats["utilities_a"] else 0
-            stats["avg_utility_b"] = statistics.mean(stats["utilities_b"]) if stats["utilities_b"] else 0
+        Args:
+            transcripts: Message lists, one per negotiation
+            workers: Worker processes (default METRICS_LANGUAGE_WORKERS, 1 = serial)
+        """
+        workers = METRICS_LANGUAGE_WORKERS if workers is None else workers
+        
+        # Transcripts are independent, so they are analyzed in parallel processes (the
+        # analyzer is all static methods, nothing but the messages is pickled)
+        if workers > 1 and len(transcripts) >= METRICS_PARALLEL_MIN_NEGOTIATIONS:
+            chunksize = max(1, min(64, len(transcripts) // (workers * 4)))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                yield from executor.map(LanguageMetrics.analyze_negotiation_transcript, transcripts, chunksize=chunksize)
+        else:
+            for messages in transcripts:
+                yield self.language_analyzer.analyze_negotiation_transcript(messages)
+    
+    def _calculate_persona_metrics(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate metrics by persona pairing from _extract_scalar_arrays columns"""
+        if not columns["pairs"]:
+            return {}
+        
+        rounds = columns["rounds"]
+        agreed = columns["agreed"]
+        utilities_a = columns["utility_a"]
+        utilities_b = columns["utility_b"]
+        
+        # Group rows by pair and aggregate each column per group
+        inverse = columns["pair_codes"]
+        counts = np.bincount(inverse)
+        agreements = np.bincount(inverse, weights=agreed)
+        total_rounds = np.bincount(inverse, weights=rounds)
+        has_a = ~np.isnan(utilities_a)
+        has_b = ~np.isnan(utilities_b)
+        n_a = np.bincount(inverse, weights=has_a)
+        n_b = np.bincount(inverse, weights=has_b)
+        sum_a = np.bincount(inverse, weights=np.where(has_a, utilities_a, 0.0))
+        sum_b = np.bincount(inverse, weights=np.where(has_b, utilities_b, 0.0))
+        
+        # Row indices of each group, in original order, for the per-pair utility lists
+        groups = np.split(np.argsort(inverse, kind="stable"), np.cumsum(counts)[:-1])
+        
+        labels = [f"{persona_a} vs {persona_b}" for persona_a, persona_b in columns["pairs"]]
+        
+        persona_stats = {}
+        # Pair codes follow first appearance, so pairings keep the order of the negotiations
+        for i in range(len(labels)):
+            rows = groups[i]
+            persona_stats[labels[i]] = {
+                "count": int(counts[i]),
+                "agreements": int(agreements[i]),
+                "total_rounds": int(total_rounds[i]),
+                "utilities_a": utilities_a[rows[has_a[rows]]].tolist(),
+                "utilities_b": utilities_b[rows[has_b[rows]]].tolist(),
+                "agreement_rate": float(agreements[i] / counts[i]) * 100,
+                "avg_rounds": float(total_rounds[i] / counts[i]),
+                "avg_utility_a": float(sum_a[i] / n_a[i]) if n_a[i] else 0,
+                "avg_utility_b": float(sum_b[i] / n_b[i]) if n_b[i] else 0
+            }
         
         return persona_stats
     
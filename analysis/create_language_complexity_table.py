@@ -7,17 +7,50 @@ This script:
 3. Generates a table for the report
 """
 
+import csv
 import sys
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import numpy as np
-import pandas as pd
 from utils.mongodb_client import get_mongodb_client
 
 
+# Table columns: (ComboMetrics sum attribute, per-agent language complexity key)
+_METRIC_FIELDS = (
+    ("words_per_msg", "avg_words_per_message"),
+    ("vocab_richness", "avg_vocabulary_richness"),
+    ("flesch_ease", "avg_flesch_reading_ease"),
+    ("flesch_grade", "avg_flesch_kincaid_grade"),
+    ("avg_sentence_length", "avg_sentence_length"),
+)
+
+
+class ComboMetrics:
+    """Running sums of both agents' language metrics for one persona combination"""
+    
+    # Fixed attribute layout: one small object per combination, no per-instance __dict__
+    __slots__ = ("negotiations", "agents", "words_per_msg", "vocab_richness",
+                 "flesch_ease", "flesch_grade", "avg_sentence_length")
+    
+    def __init__(self):
+        self.negotiations = 0  # Negotiations with Agent A metrics (the table's N)
+        self.agents = 0  # Agent metric sets summed (both agents combined)
+        for attribute, _ in _METRIC_FIELDS:
+            setattr(self, attribute, 0.0)
+    
+    def add(self, agent_metrics: dict):
+        """Add one agent's language complexity metrics"""
+        self.agents += 1
+        for attribute, key in _METRIC_FIELDS:
+            setattr(self, attribute, getattr(self, attribute) + agent_metrics.get(key, 0))
+    
+    def mean(self, attribute: str) -> float:
+        """Average of a metric over both agents (0 if there is none)"""
+        return getattr(self, attribute) / self.agents if self.agents else 0.0
+
+
 def main():
     print("=" * 80)
     print("📊 GENERATING LANGUAGE COMPLEXITY TABLE")
@@ -25,38 +58,30 @@ def main():
     
     mongo = get_mongodb_client()
     
-    # Get all negotiations with language complexity data
-    negotiations = list(mongo.negotiations_collection.find({
-        'qualitative_metrics.language_complexity': {'$exists': True}
-    }))
-    
-    print(f"\n✅ Found {len(negotiations)} negotiations with language complexity data")
-    
-    if not negotiations:
-        print("❌ No data found! Run recalculate_language_metrics.py first")
-        return
+    # Stream all negotiations with language complexity data (only the fields
+    # used) and organize them by persona combination in a single pass
+    negotiations = mongo.iter_negotiations(
+        {'qualitative_metrics.language_complexity': {'$exists': True}},
+        projection={
+            '_id': 0,
+            'agent_a_persona': 1,
+            'agent_b_persona': 1,
+            'qualitative_metrics.language_complexity': 1
+        }
+    )
     
-    # Organize data by persona combination
     persona_combinations = {}
+    total = 0
     
     for neg in negotiations:
+        total += 1
         agent_a_persona = neg.get('agent_a_persona', 'Unknown')
         agent_b_persona = neg.get('agent_b_persona', 'Unknown')
         combo = f"{agent_a_persona} vs {agent_b_persona}"
         
-        if combo not in persona_combinations:
-            persona_combinations[combo] = {
-                'a_words_per_msg': [],
-                'b_words_per_msg': [],
-                'a_vocab_richness': [],
-                'b_vocab_richness': [],
-                'a_flesch_ease': [],
-                'b_flesch_ease': [],
-                'a_flesch_grade': [],
-                'b_flesch_grade': [],
-                'a_avg_sentence_length': [],
-                'b_avg_sentence_length': []
-            }
+        combo_metrics = persona_combinations.get(combo)
+        if combo_metrics is None:
+            combo_metrics = persona_combinations[combo] = ComboMetrics()
         
         # Extract language complexity metrics
         lang_complexity = neg.get('qualitative_metrics', {}).get('language_complexity', {})
@@ -64,20 +89,19 @@ def main():
         agent_a_metrics = lang_complexity.get('agent_a', {})
         agent_b_metrics = lang_complexity.get('agent_b', {})
         
-        # Store metrics
+        # Accumulate metrics
         if agent_a_metrics:
-            persona_combinations[combo]['a_words_per_msg'].append(agent_a_metrics.get('avg_words_per_message', 0))
-            persona_combinations[combo]['a_vocab_richness'].append(agent_a_metrics.get('avg_vocabulary_richness', 0))
-            persona_combinations[combo]['a_flesch_ease'].append(agent_a_metrics.get('avg_flesch_reading_ease', 0))
-            persona_combinations[combo]['a_flesch_grade'].append(agent_a_metrics.get('avg_flesch_kincaid_grade', 0))
-            persona_combinations[combo]['a_avg_sentence_length'].append(agent_a_metrics.get('avg_sentence_length', 0))
+            combo_metrics.negotiations += 1
+            combo_metrics.add(agent_a_metrics)
         
         if agent_b_metrics:
-            persona_combinations[combo]['b_words_per_msg'].append(agent_b_metrics.get('avg_words_per_message', 0))
-            persona_combinations[combo]['b_vocab_richness'].append(agent_b_metrics.get('avg_vocabulary_richness', 0))
-            persona_combinations[combo]['b_flesch_ease'].append(agent_b_metrics.get('avg_flesch_reading_ease', 0))
-            persona_combinations[combo]['b_flesch_grade'].append(agent_b_metrics.get('avg_flesch_kincaid_grade', 0))
-            persona_combinations[combo]['b_avg_sentence_length'].append(agent_b_metrics.get('avg_sentence_length', 0))
+            combo_metrics.add(agent_b_metrics)
+    
+    print(f"\n✅ Found {total} negotiations with language complexity data")
+    
+    if not total:
+        print("❌ No data found! Run recalculate_language_metrics.py first")
+        return
     
     # Generate table
     print("\n" + "=" * 80)
@@ -86,30 +110,31 @@ def main():
     
     table_data = []
     for combo, data in sorted(persona_combinations.items()):
-        # Calculate averages (combining both agents)
-        all_words = data['a_words_per_msg'] + data['b_words_per_msg']
-        all_vocab = data['a_vocab_richness'] + data['b_vocab_richness']
-        all_flesch_ease = data['a_flesch_ease'] + data['b_flesch_ease']
-        all_flesch_grade = data['a_flesch_grade'] + data['b_flesch_grade']
-        all_sent_length = data['a_avg_sentence_length'] + data['b_avg_sentence_length']
-        
+        # Averages combine both agents
         row = {
             'Persona Combination': combo,
-            'Avg Words/Msg': f"{np.mean(all_words):.1f}" if all_words else "0.0",
-            'Vocab Richness': f"{np.mean(all_vocab):.2f}" if all_vocab else "0.00",
-            'Flesch Ease': f"{np.mean(all_flesch_ease):.1f}" if all_flesch_ease else "0.0",
-            'Flesch Grade': f"{np.mean(all_flesch_grade):.1f}" if all_flesch_grade else "0.0",
-            'Avg Sent Length': f"{np.mean(all_sent_length):.1f}" if all_sent_length else "0.0",
-            'N': len(data['a_words_per_msg'])
+            'Avg Words/Msg': f"{data.mean('words_per_msg'):.1f}",
+            'Vocab Richness': f"{data.mean('vocab_richness'):.2f}",
+            'Flesch Ease': f"{data.mean('flesch_ease'):.1f}",
+            'Flesch Grade': f"{data.mean('flesch_grade'):.1f}",
+            'Avg Sent Length': f"{data.mean('avg_sentence_length'):.1f}",
+            'N': data.negotiations
         }
         table_data.append(row)
     
-    df = pd.DataFrame(table_data)
-    print(df.to_string(index=False))
+    # Print the table with right-aligned columns
+    headers = list(table_data[0])
+    widths = [max(len(header), *(len(str(row[header])) for row in table_data)) for header in headers]
+    print(" ".join(header.rjust(width) for header, width in zip(headers, widths)))
+    for row in table_data:
+        print(" ".join(str(row[header]).rjust(width) for header, width in zip(headers, widths)))
     
     # Save to CSV
     csv_filename = "table5_language_complexity.csv"
-    df.to_csv(csv_filename, index=False)
+    with open(csv_filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=headers, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(table_data)
     print(f"\n✅ Saved to {csv_filename}")
     
     # Print explanation
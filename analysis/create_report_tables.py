@@ -23,7 +23,17 @@ def main():
     # Connect to MongoDB
     print("\n🔗 Connecting to MongoDB...")
     mongo = get_mongodb_client()
-    negotiations = list(mongo.negotiations_collection.find())
+    # Only the fields the tables use: transcripts and Judge analyses stay on the server
+    negotiations = list(mongo.iter_negotiations(projection={
+        '_id': 0,
+        'agent_a_persona': 1,
+        'agent_b_persona': 1,
+        'agreement_reached': 1,
+        'rounds': 1,
+        'utility_a': 1,
+        'utility_b': 1,
+        'qualitative_metrics': 1
+    }))
     
     print(f"✅ Found {len(negotiations)} negotiations in database")
     
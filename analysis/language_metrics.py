@@ -16,6 +16,26 @@ import nltk
 from nltk.tokenize import word_tokenize, sent_tokenize
 import textstat
 
+# Patterns counted in every message
+_NUMBER_RE = re.compile(r'\d+')
+_DOLLAR_RE = re.compile(r'\$\s*\d+')
+
+# Per-message metrics that _aggregate_metrics sums over an agent's messages
+_SUMMED_METRIC_KEYS = (
+    "word_count",
+    "avg_word_length",
+    "avg_sentence_length",
+    "vocabulary_richness",
+    "root_ttr",
+    "corrected_ttr",
+    "flesch_reading_ease",
+    "flesch_kincaid_grade",
+    "question_count",
+    "exclamation_count",
+    "number_mentions",
+    "dollar_mentions"
+)
+
 
 class LanguageMetrics:
     """Calculate objective language complexity metrics"""
@@ -48,8 +68,10 @@ class LanguageMetrics:
         """
         
         # STEP 1: Tokenize using NLTK (REQUIRED)
-        words = word_tokenize(message)  # NLTK's smart tokenizer
         sentences = sent_tokenize(message)  # NLTK's sentence splitter
+        # NLTK's smart tokenizer; word_tokenize(message) would split the sentences
+        # again, so each already-split sentence is tokenized as a single line
+        words = [word for sentence in sentences for word in word_tokenize(sentence, preserve_line=True)]
         
         # STEP 2: Calculate lexical diversity using lexicalrichness library (REQUIRED)
         lex = LexicalRichness(message)
@@ -86,8 +108,8 @@ class LanguageMetrics:
             # Linguistic features
             "question_count": message.count('?'),
             "exclamation_count": message.count('!'),
-            "number_mentions": len(re.findall(r'\d+', message)),
-            "dollar_mentions": len(re.findall(r'\$\s*\d+', message)),
+            "number_mentions": len(_NUMBER_RE.findall(message)),
+            "dollar_mentions": len(_DOLLAR_RE.findall(message)),
         }
     
     @staticmethod
@@ -95,7 +117,7 @@ class LanguageMetrics:
         """Average word length in characters"""
         if not words:
             return 0.0
-        return sum(len(word) for word in words) / len(words)
+        return sum(map(len, words)) / len(words)
     
     @staticmethod
     def calculate_flesch_metrics(message: str) -> Dict[str, float]:
@@ -194,31 +216,35 @@ class LanguageMetrics:
                 "total_dollar_mentions": 0
             }
         
-        # Calculate metrics for each individual message
-        all_metrics = [LanguageMetrics.calculate_metrics(msg) for msg in messages]
+        # Calculate metrics for each individual message, summed in a single pass
+        sums = dict.fromkeys(_SUMMED_METRIC_KEYS, 0)
+        for metrics in map(LanguageMetrics.calculate_metrics, messages):
+            for key in _SUMMED_METRIC_KEYS:
+                sums[key] += metrics[key]
+        count = len(messages)
         
         # Aggregate the results
         return {
-            "message_count": len(messages),
-            "total_words": sum(m["word_count"] for m in all_metrics),
-            "avg_words_per_message": sum(m["word_count"] for m in all_metrics) / len(messages),
-            "avg_word_length": sum(m["avg_word_length"] for m in all_metrics) / len(messages),
-            "avg_sentence_length": sum(m["avg_sentence_length"] for m in all_metrics) / len(messages),
+            "message_count": count,
+            "total_words": sums["word_count"],
+            "avg_words_per_message": sums["word_count"] / count,
+            "avg_word_length": sums["avg_word_length"] / count,
+            "avg_sentence_length": sums["avg_sentence_length"] / count,
             
             # Vocabulary diversity metrics (from lexicalrichness)
-            "avg_vocabulary_richness": sum(m["vocabulary_richness"] for m in all_metrics) / len(messages),
-            "avg_root_ttr": sum(m.get("root_ttr", 0) for m in all_metrics) / len(messages),
-            "avg_corrected_ttr": sum(m.get("corrected_ttr", 0) for m in all_metrics) / len(messages),
+            "avg_vocabulary_richness": sums["vocabulary_richness"] / count,
+            "avg_root_ttr": sums["root_ttr"] / count,
+            "avg_corrected_ttr": sums["corrected_ttr"] / count,
             
             # Readability metrics (academic standard - Flesch)
-            "avg_flesch_reading_ease": sum(m.get("flesch_reading_ease", 0) for m in all_metrics) / len(messages),
-            "avg_flesch_kincaid_grade": sum(m.get("flesch_kincaid_grade", 0) for m in all_metrics) / len(messages),
+            "avg_flesch_reading_ease": sums["flesch_reading_ease"] / count,
+            "avg_flesch_kincaid_grade": sums["flesch_kincaid_grade"] / count,
             
             # Linguistic features (totals)
-            "total_questions": sum(m["question_count"] for m in all_metrics),
-            "total_exclamations": sum(m["exclamation_count"] for m in all_metrics),
-            "total_number_mentions": sum(m["number_mentions"] for m in all_metrics),
-            "total_dollar_mentions": sum(m["dollar_mentions"] for m in all_metrics)
+            "total_questions": sums["question_count"],
+            "total_exclamations": sums["exclamation_count"],
+            "total_number_mentions": sums["number_mentions"],
+            "total_dollar_mentions": sums["dollar_mentions"]
         }
 
 
@@ -415,7 +415,10 @@ if st.session_state.negotiation_results:
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Agreement Reached", "✅ Yes" if results['agreement_reached'] else "❌ No")
+        if results.get('judge_error'):
+            st.metric("Agreement Reached", "⚠️ Unknown")
+        else:
+            st.metric("Agreement Reached", "✅ Yes" if results['agreement_reached'] else "❌ No")
     
     with col2:
         st.metric("Rounds", f"{results['rounds']}/{results['max_rounds']}")
@@ -426,6 +429,9 @@ if st.session_state.negotiation_results:
         else:
             st.metric("Final Price", "N/A")
     
+    if results.get('judge_error'):
+        st.warning(f"⚠️ Judge analysis failed, so this run has no outcome and was not saved: {results['judge_error']}")
+    
     # Show messages with chat interface
     st.subheader("💬 Negotiation Dialogue")
     display_chat_messages(results['messages'])
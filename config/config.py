@@ -23,6 +23,96 @@ DB_PASS = os.getenv("DB_PASS")
 DB_HOST = os.getenv("DB_HOST", "cluster0.mongodb.net")  # Default MongoDB Atlas host
 DB_CONNECTION_STRING = os.getenv("DB_CONNECTION_STRING")  # Optional: full connection string
 
+# Documents fetched per round trip when the analysis scripts stream negotiations
+DB_BATCH_SIZE = 5000
+
+# Compute the numeric metrics (agreement, rounds, utilities, persona pairs) in
+# a MongoDB $group pipeline; calculate_metrics.py then only fetches transcripts
+METRICS_SERVER_SIDE = os.getenv("METRICS_SERVER_SIDE", "false").lower() == "true"
+
+# Language metrics are CPU-bound, so calculate_metrics.py spreads them over
+# this many worker processes; smaller sets than METRICS_PARALLEL_MIN_NEGOTIATIONS
+# run serially, where starting the workers would cost more than it saves
+METRICS_LANGUAGE_WORKERS = int(os.getenv("METRICS_LANGUAGE_WORKERS", str(os.cpu_count() or 1)))
+METRICS_PARALLEL_MIN_NEGOTIATIONS = 200
+
 # Simulation Settings
 MAX_ROUNDS = 10
 TIMEOUT_SECONDS = 60
+
+# Prompt history window: the first N messages (opening offers) are always kept,
+# plus the most recent M; older messages in between are left out of the prompt
+HISTORY_ANCHOR_MESSAGES = 2
+HISTORY_RECENT_MESSAGES = 20
+
+# Batch testing (analysis/batch_testing.py): negotiations run at once
+BATCH_MAX_CONCURRENT = 8
+
+# Run batch negotiations in worker processes instead of threads, so the
+# CPU-bound post-negotiation analyzers don't contend for the GIL (each worker
+# process loads its own models)
+BATCH_USE_PROCESSES = os.getenv("BATCH_USE_PROCESSES", "false").lower() == "true"
+
+# Judge transcript window: analyses see the first N messages (2 rounds) plus
+# the most recent M (8 rounds); agreements are decided at the end, so the middle
+# of longer runs is left out. A run of MAX_ROUNDS rounds is sent in full
+JUDGE_ANCHOR_MESSAGES = 4
+JUDGE_RECENT_MESSAGES = 16
+
+# Judge async calls: concurrent requests in flight, and retries with
+# exponential backoff on rate limits (429) / timeouts
+JUDGE_MAX_CONCURRENT = 8
+JUDGE_MAX_RETRIES = 3
+JUDGE_BACKOFF_SECONDS = 1.0
+
+# Judge response cache: identical requests (same model, schema and prompts)
+# reuse the previous response instead of calling the API again
+JUDGE_CACHE_SIZE = 4096
+
+# Judge semantic cache (opt-in, needs sentence-transformers): quick checks
+# whose messages are near-paraphrases of an earlier round reuse its verdict
+JUDGE_SEMANTIC_CACHE = os.getenv("JUDGE_SEMANTIC_CACHE", "false").lower() == "true"
+JUDGE_SEMANTIC_THRESHOLD = 0.93
+
+# Full transcript analyses reuse a cached verdict only for transcripts of the
+# same length quoting the same numbers, compared over their last messages
+JUDGE_SEMANTIC_ANALYSIS_THRESHOLD = 0.95
+JUDGE_SEMANTIC_ANALYSIS_MESSAGES = 6
+
+# Judge analyses can also be cached in MongoDB (judge_cache collection), so
+# later sessions reuse the verdict for an identical transcript (opt-in;
+# deterministic temperature-0 requests only)
+JUDGE_PERSISTENT_CACHE = os.getenv("JUDGE_PERSISTENT_CACHE", "false").lower() == "true"
+
+# Rounds packed into one Judge request by check_agreement_batch
+JUDGE_BATCH_SIZE = 8
+
+# Transcripts packed into one Judge request by analyze_negotiations_batch
+JUDGE_ANALYSIS_BATCH_SIZE = 5
+
+# Judge.analyze_transcripts switches to the OpenAI Batch API (half price,
+# results within 24h) above this many transcripts
+JUDGE_BATCH_API_THRESHOLD = 100
+JUDGE_BATCH_POLL_SECONDS = 30
+
+# Judge quick checks run on a smaller, faster model per provider. Agreements
+# it reports are confirmed by the Judge model
+JUDGE_QUICK_MODEL = os.getenv("JUDGE_QUICK_MODEL", "gpt-4o-mini")
+JUDGE_QUICK_MODEL_ANTHROPIC = os.getenv("JUDGE_QUICK_MODEL_ANTHROPIC", "claude-3-5-haiku-latest")
+JUDGE_QUICK_MAX_TOKENS = 50
+
+# Realtime negotiations can judge clear-cut rounds locally (opt-in): the LLM
+# quick check then only runs when an agreement is plausible, i.e. agreement
+# wording without a clear same-price acceptance, or offers within this gap
+JUDGE_LOCAL_ROUND_CHECKS = os.getenv("JUDGE_LOCAL_ROUND_CHECKS", "false").lower() == "true"
+JUDGE_LOCAL_PRICE_GAP = 0.05
+
+# Realtime negotiations can draft Agent A's next message while the Judge
+# quick-checks the round (opt-in): hides the check's latency, but the draft
+# is thrown away (and still billed) when the round turns out to be a deal
+JUDGE_SPECULATIVE_NEXT_TURN = os.getenv("JUDGE_SPECULATIVE_NEXT_TURN", "false").lower() == "true"
+
+# Keep OpenAI's compiled structured-output schemas warm between bursts with a
+# tiny periodic request per (model, schema) (opt-in: each warmup is billed)
+JUDGE_SCHEMA_WARMUP = os.getenv("JUDGE_SCHEMA_WARMUP", "false").lower() == "true"
+JUDGE_SCHEMA_WARMUP_SECONDS = 90
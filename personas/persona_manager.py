@@ -1,9 +1,39 @@
 
 
-from typing import Dict, List, Optional
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
 from .persona_configs import PersonaConfigs
 
 
+def canonical_scenario_blob(scenario_public_info: Dict) -> str:
+    """
+    Serialize public scenario info canonically (sorted keys, no whitespace)
+    
+    Both agents of a scenario get the same blob regardless of dict ordering,
+    so the context block built from it is byte-identical for them.
+    
+    Args:
+        scenario_public_info: Public information from scenario
+        
+    Returns:
+        Canonical JSON string
+    """
+    return json.dumps(scenario_public_info, sort_keys=True, separators=(",", ":"), default=str)
+
+
+@lru_cache(maxsize=32)
+def _build_scenario_context(scenario_blob: str) -> str:
+    """Render the shared NEGOTIATION CONTEXT block from a canonical scenario blob"""
+    return "\n".join([
+        "=" * 60,
+        "NEGOTIATION CONTEXT:",
+        "=" * 60,
+        PersonaManager._format_public_info(json.loads(scenario_blob)),
+        ""
+    ])
+
+
 class PersonaManager:
     """Manages persona application to agent prompts"""
     
@@ -40,7 +70,7 @@ class PersonaManager:
         conversation_history: List[Dict] = None,
         round_number: int = 1,
         agent_id: str = None,
-        my_previous_offers: List[float] = None
+        my_previous_offers: Sequence[float] = None
     ) -> str:
         """
         Build a complete prompt for an agent with persona, scenario, and history
@@ -55,6 +85,30 @@ class PersonaManager:
         Returns:
             Complete prompt string for the LLM
         """
+        static_prompt = self.build_static_prompt(persona_name, scenario_public_info, agent_secrets)
+        dynamic_prompt = self.build_dynamic_prompt(conversation_history, round_number, agent_id)
+        return static_prompt + "\n" + dynamic_prompt
+    
+    def build_static_prompt(
+        self,
+        persona_name: str,
+        scenario_public_info: Dict,
+        agent_secrets: Dict
+    ) -> str:
+        """
+        Build the part of the prompt that never changes during a negotiation
+        (scenario context, role, persona and private constraints)
+        
+        Sent as a stable prefix so provider-side prompt caching can reuse it.
+        
+        Args:
+            persona_name: Name of the persona to use
+            scenario_public_info: Public information from scenario
+            agent_secrets: Agent's private information
+            
+        Returns:
+            Static prompt string
+        """
         persona = self.get_persona(persona_name)
         if not persona:
             raise ValueError(f"Persona '{persona_name}' not found")
@@ -64,33 +118,30 @@ class PersonaManager:
         
         role = agent_secrets.get("role", "Unknown")
         
-        # 1. Role and Goal (Clear but not prescriptive)
+        # 1. Negotiation Context - shared by both agents, so it leads the
+        # prompt to keep the provider-cached prefix identical across them
+        prompt_parts.append(_build_scenario_context(canonical_scenario_blob(scenario_public_info)))
+        
+        # 2. Role and Goal (Clear but not prescriptive)
         prompt_parts.append("=" * 60)
         prompt_parts.append(f"YOUR ROLE: {role.upper()}")
         prompt_parts.append("=" * 60)
         
         if role == "Seller":
-            prompt_parts.append("You are selling the item described below.")
+            prompt_parts.append("You are selling the item described above.")
             prompt_parts.append("Your goal: Sell for the HIGHEST price possible within your acceptable range.")
         elif role == "Buyer":
-            prompt_parts.append("You are buying the item described below.")
+            prompt_parts.append("You are buying the item described above.")
             prompt_parts.append("Your goal: Buy for the LOWEST price possible within your acceptable range.")
         else:
             prompt_parts.append(f"You are the {role}.")
         prompt_parts.append("")
         
-        # 2. Personality (minimal)
+        # 3. Personality (minimal)
         if persona.get("prompt_addition"):
             prompt_parts.append(persona.get("prompt_addition"))
             prompt_parts.append("")
         
-        # 3. Negotiation Context
-        prompt_parts.append("=" * 60)
-        prompt_parts.append("NEGOTIATION CONTEXT:")
-        prompt_parts.append("=" * 60)
-        prompt_parts.append(self._format_public_info(scenario_public_info))
-        prompt_parts.append("")
-        
         # 4. Your Constraints (private info)
         prompt_parts.append("=" * 60)
         prompt_parts.append("YOUR CONSTRAINTS:")
@@ -100,28 +151,116 @@ class PersonaManager:
         prompt_parts.append("Note: Use this information strategically. You may choose whether to reveal it.")
         prompt_parts.append("")
         
+        return "\n".join(prompt_parts)
+    
+    def build_dynamic_prompt(
+        self,
+        conversation_history: List[Dict] = None,
+        round_number: int = 1,
+        agent_id: str = None,
+        rendered_history: str = None
+    ) -> str:
+        """
+        Build the per-turn part of the prompt (conversation so far and the task)
+        
+        Args:
+            conversation_history: List of previous messages (optional)
+            round_number: Current round number
+            agent_id: ID of the agent the prompt is for
+            rendered_history: History already formatted with format_history_entry
+                (optional, used instead of formatting conversation_history)
+            
+        Returns:
+            Dynamic prompt string
+        """
+        prompt_parts = []
+        
+        if rendered_history is None and conversation_history:
+            rendered_history = self._format_conversation_history(conversation_history, current_agent_id=agent_id)
+        
         # 5. Conversation history
-        if conversation_history:
+        if rendered_history:
             prompt_parts.append("=" * 60)
             prompt_parts.append(f"CONVERSATION HISTORY (Round {round_number}):")
             prompt_parts.append("=" * 60)
-            prompt_parts.append(self._format_conversation_history(conversation_history, current_agent_id=agent_id))
+            prompt_parts.append(rendered_history)
         
         # 6. Task (simple and clear)
-        prompt_parts.append("=" * 60)
-        prompt_parts.append("YOUR TASK:")
-        prompt_parts.append("=" * 60)
-        if conversation_history:
-            prompt_parts.append("Read the conversation above and respond to the other party's latest message.")
-            prompt_parts.append("Continue negotiating toward an agreement that maximizes your outcome.")
-        else:
-            prompt_parts.append("Begin the negotiation. Make your opening statement.")
-        prompt_parts.append("")
-        prompt_parts.append("Your response (do not include labels like 'Agent A:' or 'Seller:'):")
+        prompt_parts.append(self._format_task(bool(rendered_history)))
         
         return "\n".join(prompt_parts)
     
-    def _format_public_info(self, public_info: Dict) -> str:
+    def build_chat_messages(
+        self,
+        conversation_history: List[Dict] = None,
+        agent_id: str = None
+    ) -> List[Dict[str, str]]:
+        """
+        Build the per-turn chat messages for the LLM
+        
+        Each previous message becomes its own chat turn ("assistant" for the
+        agent's own messages, "user" for the other party's), followed by the
+        task instruction. Earlier turns stay byte-identical from one call to
+        the next, so providers can serve them from their prefix cache.
+        
+        Args:
+            conversation_history: List of previous messages (optional)
+            agent_id: ID of the agent the messages are for
+            
+        Returns:
+            List of {"role", "content"} dictionaries, starting and ending with "user"
+        """
+        chat_messages = []
+        for message in conversation_history or []:
+            self.append_chat_message(chat_messages, message, agent_id)
+        return self.finish_chat_messages(chat_messages)
+    
+    def append_chat_message(self, chat_messages: List[Dict[str, str]], message: Dict, agent_id: str = None):
+        """
+        Append one conversation message to a chat built with build_chat_messages
+        
+        Lets callers keep the chat turns up to date incrementally instead of
+        rebuilding them from the whole history every turn.
+        """
+        # The chat must open with a user turn: if we spoke first, replay the opening task
+        if not chat_messages and message.get("agent") == agent_id:
+            chat_messages.append({"role": "user", "content": self._format_task(False)})
+        
+        role = "assistant" if message.get("agent") == agent_id else "user"
+        self._append_chat_message(chat_messages, role, message.get("message", ""))
+    
+    def finish_chat_messages(self, chat_messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Return a copy of the chat turns with the task instruction appended"""
+        finished = list(chat_messages)
+        self._append_chat_message(finished, "user", self._format_task(bool(chat_messages)))
+        return finished
+    
+    @staticmethod
+    def _append_chat_message(chat_messages: List[Dict[str, str]], role: str, content: str):
+        """Append a chat turn, merging it into the previous one if the role repeats"""
+        if chat_messages and chat_messages[-1]["role"] == role:
+            # Replace rather than mutate: the previous dict may be shared with a sent request
+            chat_messages[-1] = {"role": role, "content": chat_messages[-1]["content"] + "\n\n" + content}
+        else:
+            chat_messages.append({"role": role, "content": content})
+    
+    def _format_task(self, has_history: bool) -> str:
+        """Format the task instruction that closes every prompt"""
+        lines = []
+        lines.append("=" * 60)
+        lines.append("YOUR TASK:")
+        lines.append("=" * 60)
+        if has_history:
+            lines.append("Read the conversation above and respond to the other party's latest message.")
+            lines.append("Continue negotiating toward an agreement that maximizes your outcome.")
+        else:
+            lines.append("Begin the negotiation. Make your opening statement.")
+        lines.append("")
+        lines.append("Your response (do not include labels like 'Agent A:' or 'Seller:'):")
+        return "\n".join(lines)
+    
+    @staticmethod
+    def _format_public_info(public_info: Dict) -> str:
         """Format public information for the prompt"""
         lines = []
         for key, value in public_info.items():
@@ -157,20 +296,25 @@ class PersonaManager:
     
     def _format_conversation_history(self, history: List[Dict], current_agent_id: str = None) -> str:
         """Format conversation history for the prompt"""
-        lines = []
-        for i, message in enumerate(history, 1):
-            agent = message.get("agent", "Unknown")
-            text = message.get("message", "")
-            
-            # Make it clear who said what
-            if current_agent_id and agent == current_agent_id:
-                lines.append(f"Round {i}:")
-                lines.append(f"  You said: {text}")
-            else:
-                lines.append(f"Round {i}:")
-                lines.append(f"  The other party said: {text}")
-            lines.append("")
-        return "\n".join(lines)
+        return "\n".join(
+            self.format_history_entry(i, message, current_agent_id)
+            for i, message in enumerate(history, 1)
+        )
+    
+    def format_history_entry(self, index: int, message: Dict, current_agent_id: str = None) -> str:
+        """
+        Format a single history message the way _format_conversation_history does
+        
+        Entries joined with "\\n" give the full formatted history, so callers can
+        keep a rolling rendering and append one entry per message.
+        """
+        agent = message.get("agent", "Unknown")
+        text = message.get("message", "")
+        
+        # Make it clear who said what
+        if current_agent_id and agent == current_agent_id:
+            return f"Round {index}:\n  You said: {text}\n"
+        return f"Round {index}:\n  The other party said: {text}\n"
     
     def get_persona_traits(self, persona_name: str) -> List[str]:
         """
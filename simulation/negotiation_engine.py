@@ -3,6 +3,7 @@ Negotiation Engine
 Main loop that runs negotiations between agents
 """
 
+import asyncio
 from typing import Dict, List, Optional, Tuple, Any
 from agents.agent import Agent
 from agents.judge import Judge
@@ -76,7 +77,8 @@ class NegotiationEngine:
         agent_a: Agent,
         agent_b: Agent,
         max_rounds: int = None,
-        scenario_type: str = "price_negotiation"
+        scenario_type: str = "price_negotiation",
+        agreement_only: bool = False
     ) -> Dict[str, Any]:
         """
         Run a negotiation between two agents
@@ -85,6 +87,8 @@ class NegotiationEngine:
             agent_a: First agent
             agent_b: Second agent
             max_rounds: Maximum rounds (overrides default)
+            agreement_only: Only the outcome is needed - the Judge analysis of a
+                            failed negotiation is cut short (see Judge.analyze_negotiation)
             
         Returns:
             Dictionary with negotiation results
@@ -150,6 +154,99 @@ class NegotiationEngine:
         # Now use Judge to analyze the complete negotiation
         judge = Judge()
         judge_analysis = judge.analyze_negotiation(
+            messages=messages,
+            scenario_info=agent_a.scenario_public_info,
+            agent_a_secrets=agent_a.agent_secrets,
+            agent_b_secrets=agent_b.agent_secrets,
+            scenario_type=scenario_type,
+            agreement_only=agreement_only
+        )
+        
+        return self._build_results(agent_a, agent_b, messages, round_count, max_rounds, judge_analysis)
+    
+    async def run_negotiation_async(
+        self,
+        agent_a: Agent,
+        agent_b: Agent,
+        max_rounds: int = None,
+        scenario_type: str = "price_negotiation"
+    ) -> Dict[str, Any]:
+        """
+        Async version of run_negotiation
+        
+        Turns within one negotiation are still sequential (each agent answers
+        the other), but awaiting many of these concurrently overlaps their LLM
+        latency - see run_negotiations_async.
+        
+        Args:
+            agent_a: First agent
+            agent_b: Second agent
+            max_rounds: Maximum rounds (overrides default)
+            
+        Returns:
+            Dictionary with negotiation results
+        """
+        max_rounds = max_rounds or self.max_rounds
+        
+        # Reset agents
+        agent_a.reset()
+        agent_b.reset()
+        
+        # Track negotiation
+        messages = []
+        round_count = 0
+        
+        # Negotiation loop - run to completion (let Judge determine outcome)
+        for round_num in range(1, max_rounds + 1):
+            round_count = round_num
+            
+            # Agent A's turn
+            try:
+                message_a = await agent_a.generate_message_async()
+                messages.append({
+                    "round": round_num,
+                    "agent": "Agent A",
+                    "persona": agent_a.persona_name,
+                    "message": message_a
+                })
+                
+                # Add to Agent B's history
+                agent_b.add_message_to_history("Agent A", message_a)
+                
+            except Exception as e:
+                messages.append({
+                    "round": round_num,
+                    "agent": "Agent A",
+                    "persona": agent_a.persona_name,
+                    "message": f"[Error: {str(e)}]"
+                })
+                break
+            
+            # Agent B's turn
+            try:
+                message_b = await agent_b.generate_message_async()
+                messages.append({
+                    "round": round_num,
+                    "agent": "Agent B",
+                    "persona": agent_b.persona_name,
+                    "message": message_b
+                })
+                
+                # Add to Agent A's history
+                agent_a.add_message_to_history("Agent B", message_b)
+                
+            except Exception as e:
+                messages.append({
+                    "round": round_num,
+                    "agent": "Agent B",
+                    "persona": agent_b.persona_name,
+                    "message": f"[Error: {str(e)}]"
+                })
+                break
+        
+        # Final analysis by Judge
+        judge = Judge()
+        judge_analysis = await judge.aanalyze_negotiation(
             messages=messages,
             scenario_info=agent_a.scenario_public_info,
             agent_a_secrets=agent_a.agent_secrets,
@@ -157,6 +254,43 @@ class NegotiationEngine:
             scenario_type=scenario_type
         )
         
+        return self._build_results(agent_a, agent_b, messages, round_count, max_rounds, judge_analysis)
+    
+    async def run_negotiations_async(
+        self,
+        agent_pairs: List[Tuple[Agent, Agent]],
+        max_rounds: int = None,
+        scenario_type: str = "price_negotiation"
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several independent negotiations concurrently
+        
+        Total time is roughly that of the slowest negotiation instead of the
+        sum of all of them.
+        
+        Args:
+            agent_pairs: List of (Agent A, Agent B) tuples, one per negotiation
+            max_rounds: Maximum rounds (overrides default)
+            scenario_type: Type of scenario
+            
+        Returns:
+            List of results dictionaries, in the same order as agent_pairs
+        """
+        return await asyncio.gather(*(
+            self.run_negotiation_async(agent_a, agent_b, max_rounds, scenario_type)
+            for agent_a, agent_b in agent_pairs
+        ))
+    
+    def _build_results(
+        self,
+        agent_a: Agent,
+        agent_b: Agent,
+        messages: List[Dict],
+        round_count: int,
+        max_rounds: int,
+        judge_analysis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build the results dictionary from the transcript and Judge analysis"""
         # Extract results from Judge analysis
         agreement_reached = judge_analysis.get("agreement_reached", False)
         agreement_terms = judge_analysis.get("agreement_terms")
@@ -180,7 +314,8 @@ class NegotiationEngine:
             "agent_a_info": agent_a.get_info(),
             "agent_b_info": agent_b.get_info(),
             "scenario": agent_a.scenario_public_info.get("item", "Unknown"),
-            "judge_analysis": judge_analysis  # Include full Judge analysis
+            "judge_analysis": judge_analysis,  # Include full Judge analysis
+            "judge_error": judge_analysis.get("judge_error")  # Set when the Judge gave no verdict
         }
         
         return results
@@ -232,8 +367,10 @@ class NegotiationEngine:
         results["agent_a_persona"] = agent_a_persona
         results["agent_b_persona"] = agent_b_persona
         
-        # Save to MongoDB if requested
-        if save_to_db:
+        # Save to MongoDB if requested (a failed Judge analysis is not a real outcome)
+        if save_to_db and results["judge_error"]:
+            print(f"⚠️ Not saved to MongoDB: Judge analysis failed ({results['judge_error']})")
+        elif save_to_db:
             try:
                 mongodb = get_mongodb_client()
                 doc_id = mongodb.save_negotiation(
@@ -10,12 +10,13 @@ JUDGE AS REAL-TIME REFEREE:
 """
 
 import uuid
-from typing import Dict, Any, Generator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Generator, Optional
 from agents.agent import Agent
 from agents.judge import Judge
 from utils.scenario_loader import ScenarioLoader
 from utils.mongodb_client import get_mongodb_client
-from config.config import MAX_ROUNDS
+from config.config import MAX_ROUNDS, JUDGE_LOCAL_ROUND_CHECKS, JUDGE_SPECULATIVE_NEXT_TURN
 
 
 def run_negotiation_realtime(
@@ -49,6 +50,12 @@ def run_negotiation_realtime(
     round_count = 0
     agreement_detected = False
     agreed_price = None
+    judge_analysis = None
+    
+    # Agent A's next message, drafted while the Judge checks the round
+    # (see JUDGE_SPECULATIVE_NEXT_TURN)
+    pending_message_a: Optional[Future] = None
+    draft_pool: Optional[ThreadPoolExecutor] = None
     
     # Initialize Judge for real-time refereeing
     judge = Judge()
@@ -59,7 +66,12 @@ def run_negotiation_realtime(
         
         # Agent A's turn
         try:
-            message_a = agent_a.generate_message()
+            if pending_message_a is not None:
+                message_a = pending_message_a.result()
+                pending_message_a = None
+                agent_a.record_message(message_a)
+            else:
+                message_a = agent_a.generate_message()
             msg_data = {
                 "id": str(uuid.uuid4()),  # Unique message ID
                 "round": round_num,
@@ -125,11 +137,31 @@ def run_negotiation_realtime(
         # ALSO extracts price offers for qualitative analysis!
         yield {"type": "status", "message": "⚖️ Judge checking for agreement..."}
         
-        quick_check = judge.check_agreement_quick(
-            message_a=message_a,
-            message_b=message_b,
-            round_num=round_num
-        )
+        if round_num == max_rounds:
+            # Last round: one call checks the round and analyzes the whole negotiation
+            quick_check, judge_analysis = judge.analyze_final(
+                messages=messages,
+                scenario_info=agent_a.scenario_public_info,
+                agent_a_secrets=agent_a.agent_secrets,
+                agent_b_secrets=agent_b.agent_secrets,
+                scenario_type=scenario_type
+            )
+        else:
+            quick_check = None
+            if JUDGE_LOCAL_ROUND_CHECKS:
+                quick_check = judge.check_agreement_local(message_a, message_b)
+            if quick_check is None:
+                # Agent A's next message doesn't depend on the verdict: draft it meanwhile
+                if JUDGE_SPECULATIVE_NEXT_TURN:
+                    if draft_pool is None:
+                        draft_pool = ThreadPoolExecutor(max_workers=1)
+                    pending_message_a = draft_pool.submit(agent_a.draft_message)
+                quick_check = judge.check_agreement_quick(
+                    message_a=message_a,
+                    message_b=message_b,
+                    round_num=round_num,
+                    scenario_id=agent_a.scenario_public_info.get("item", "")
+                )
         
         # ✨ NEW: Add Judge-extracted prices to the messages we saved
         # This enables academic-grade concession analysis!
@@ -140,6 +172,7 @@ def run_negotiation_realtime(
             messages[-1]["price_offer"] = quick_check.get("agent_b_offer")
         
         if quick_check.get("agreement_reached"):
+            pending_message_a = None  # The negotiation is over: drop the draft
             agreement_detected = True
             agreed_price = quick_check.get("agreed_price")
             yield {
@@ -153,16 +186,26 @@ def run_negotiation_realtime(
                 "message": f"↔️ Judge: No agreement yet. {quick_check.get('explanation', 'Negotiation continues...')}"
             }
     
+    if draft_pool is not None:
+        draft_pool.shutdown(wait=False)
+    
+    if judge.quick_checks_skipped:
+        print(f"⚖️ Judge skipped {judge.quick_checks_skipped}/{judge.quick_checks_total} quick checks (no price or deal wording)")
+    if judge.quick_checks_local:
+        print(f"⚖️ Judge decided {judge.quick_checks_local}/{judge.quick_checks_total} quick checks locally (no API call)")
+    
     # Use Judge to analyze the complete negotiation for winner/satisfaction
-    yield {"type": "status", "message": "📊 Judge analyzing full negotiation..."}
-    
-    judge_analysis = judge.analyze_negotiation(
-        messages=messages,
-        scenario_info=agent_a.scenario_public_info,
-        agent_a_secrets=agent_a.agent_secrets,
-        agent_b_secrets=agent_b.agent_secrets,
-        scenario_type=scenario_type
-    )
+    # (already done if the negotiation ran to its last round)
+    if judge_analysis is None:
+        yield {"type": "status", "message": "📊 Judge analyzing full negotiation..."}
+        
+        judge_analysis = judge.analyze_negotiation(
+            messages=messages,
+            scenario_info=agent_a.scenario_public_info,
+            agent_a_secrets=agent_a.agent_secrets,
+            agent_b_secrets=agent_b.agent_secrets,
+            scenario_type=scenario_type
+        )
     
     # If agreement was detected during rounds, use that info
     if agreement_detected:
@@ -170,9 +213,13 @@ def run_negotiation_realtime(
         judge_analysis["agreement_terms"] = {"price": agreed_price}
         judge_analysis["stopped_early"] = True
     
-    # Extract results from Judge analysis
+    # Extract results from Judge analysis. A failed analysis has no verdict, so
+    # unless the rounds already found an agreement the outcome is unknown
     agreement_reached = judge_analysis.get("agreement_reached", False)
     agreement_terms = judge_analysis.get("agreement_terms")
+    judge_error = None if agreement_detected else judge_analysis.get("judge_error")
+    if judge_error:
+        yield {"type": "status", "message": f"⚠️ Judge analysis failed, outcome unknown: {judge_error}"}
     
     # Calculate utilities if agreement reached
     utility_a = None
@@ -335,6 +382,7 @@ def run_negotiation_realtime(
         "scenario": agent_a.scenario_public_info.get("item", "Unknown"),
         "scenario_type": scenario_type,
         "judge_analysis": judge_analysis,
+        "judge_error": judge_error,
         "type": "complete"
     }
     
@@ -378,21 +426,25 @@ def run_negotiation_realtime(
     else:
         print(f"⚠️ No qualitative metrics calculated")
     
-    # Save to MongoDB
-    try:
-        yield {"type": "status", "message": "Saving to MongoDB..."}
-        mongo_client = get_mongodb_client()
-        negotiation_id = mongo_client.save_negotiation(
-            scenario_name=agent_a.scenario_public_info.get("name", "Unknown"),
-            agent_a_persona=agent_a.persona_name,
-            agent_b_persona=agent_b.persona_name,
-            results=results
-        )
-        results["negotiation_id"] = negotiation_id
-        yield {"type": "status", "message": f"✅ Saved to MongoDB (ID: {negotiation_id})"}
-    except Exception as e:
-        yield {"type": "status", "message": f"⚠️ Failed to save to MongoDB: {str(e)}"}
-        print(f"Warning: Could not save to MongoDB: {e}")
+    # Save to MongoDB (not when the Judge failed: it would be stored as a real
+    # no-agreement outcome)
+    if judge_error:
+        yield {"type": "status", "message": "⚠️ Not saved to MongoDB: Judge analysis failed"}
+    else:
+        try:
+            yield {"type": "status", "message": "Saving to MongoDB..."}
+            mongo_client = get_mongodb_client()
+            negotiation_id = mongo_client.save_negotiation(
+                scenario_name=agent_a.scenario_public_info.get("name", "Unknown"),
+                agent_a_persona=agent_a.persona_name,
+                agent_b_persona=agent_b.persona_name,
+                results=results
+            )
+            results["negotiation_id"] = negotiation_id
+            yield {"type": "status", "message": f"✅ Saved to MongoDB (ID: {negotiation_id})"}
+        except Exception as e:
+            yield {"type": "status", "message": f"⚠️ Failed to save to MongoDB: {str(e)}"}
+            print(f"Warning: Could not save to MongoDB: {e}")
     
     yield results
     return results
@@ -0,0 +1,32 @@
+"""
+Tests for Judge analyses that fail (no verdict, flagged with judge_error)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.judge import Judge
+
+
+@pytest.fixture
+def judge():
+    """Judge without an LLM client: _parse_analysis never calls the API"""
+    return Judge.__new__(Judge)
+
+
+def test_valid_analysis_has_no_judge_error(judge):
+    analysis = judge._parse_analysis('{"agreement_reached": false, "agreement_terms": null}', "price_only")
+    assert analysis == {"agreement_reached": False, "agreement_terms": None}
+
+
+def test_truncated_analysis_is_a_judge_error(judge):
+    analysis = judge._parse_analysis('{"agreement_reached": true, "agreement_terms": {"pri', "price_only")
+    assert analysis["judge_error"]
+    # No verdict is invented from the partial text
+    assert analysis["agreement_reached"] is False
+    assert analysis["agreement_terms"] is None
+    assert set(analysis) == {"agreement_reached", "agreement_terms", "judge_error"}
@@ -0,0 +1,52 @@
+"""
+Tests for Judge.check_agreement_local (rounds decided without an API call)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.judge import Judge
+
+
+@pytest.fixture
+def judge():
+    """Judge without an LLM client: check_agreement_local never calls the API"""
+    judge = Judge.__new__(Judge)
+    judge.quick_checks_total = 0
+    judge.quick_checks_local = 0
+    return judge
+
+
+@pytest.mark.parametrize("message_a, message_b", [
+    # Acceptance without naming a price
+    ("I can do $800, final offer.", "That works for me, let's do it."),
+    ("My price is $900.", "Sounds good to me."),
+    ("Alright, you've convinced me.", "I'll pay $750 then."),
+    # Offers within JUDGE_LOCAL_PRICE_GAP
+    ("I can go down to $800.", "I could pay $790."),
+    # Agreement wording
+    ("Would you accept $800?", "Maybe, let me think about $800."),
+])
+def test_undecided_rounds_go_to_the_llm(judge, message_a, message_b):
+    assert judge.check_agreement_local(message_a, message_b) is None
+    assert judge.quick_checks_local == 0
+
+
+def test_offers_far_apart_are_no_agreement(judge):
+    result = judge.check_agreement_local("$900 is my lowest price.", "I can only pay $600.")
+    
+    assert result["agreement_reached"] is False
+    assert result["agent_a_offer"] == 900
+    assert result["agent_b_offer"] == 600
+    assert judge.quick_checks_local == 1
+
+
+def test_same_price_acceptance_is_agreement(judge):
+    result = judge.check_agreement_local("I accept $800.", "Deal at $800.")
+    
+    assert result["agreement_reached"] is True
+    assert result["agreed_price"] == 800
@@ -0,0 +1,47 @@
+"""
+Tests for the Judge's transcript window (Judge._format_conversation)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.judge import Judge
+from config.config import MAX_ROUNDS
+
+
+@pytest.fixture
+def judge():
+    """Judge without an LLM client: formatting never calls the API"""
+    judge = Judge.__new__(Judge)
+    judge._conversation_cache = (None, [], None)
+    return judge
+
+
+def _transcript(message_count):
+    return [
+        {"round": i // 2 + 1, "agent": "Agent A" if i % 2 == 0 else "Agent B", "message": f"Message {i}"}
+        for i in range(message_count)
+    ]
+
+
+def test_max_rounds_run_is_not_trimmed(judge):
+    messages = _transcript(2 * MAX_ROUNDS)
+    
+    conversation = judge._format_conversation(messages)
+    
+    assert "omitted" not in conversation
+    assert all(f"Message {i}\n" in conversation for i in range(len(messages)))
+
+
+def test_longer_run_keeps_first_and_last_rounds(judge):
+    messages = _transcript(24)
+    
+    conversation = judge._format_conversation(messages)
+    
+    assert "[... 4 earlier messages omitted ...]" in conversation
+    assert "Message 3\n" in conversation and "Message 8\n" in conversation
+    assert "Message 4\n" not in conversation and "Message 7\n" not in conversation
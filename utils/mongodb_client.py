@@ -5,9 +5,9 @@ Handles connection and operations for storing negotiation histories
 
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
 from datetime import datetime
-from config.config import DB_NAME, DB_USER, DB_PASS, DB_HOST, DB_CONNECTION_STRING
+from config.config import DB_NAME, DB_USER, DB_PASS, DB_HOST, DB_CONNECTION_STRING, DB_BATCH_SIZE
 
 
 class MongoDBClient:
@@ -19,6 +19,7 @@ class MongoDBClient:
         self.db = None
         self.negotiations_collection = None
         self.tests_collection = None
+        self.judge_cache_collection = None
         self._connect()
     
     def _connect(self):
@@ -49,6 +50,7 @@ class MongoDBClient:
             self.db = self.client[DB_NAME]
             self.negotiations_collection = self.db['negotiations']
             self.tests_collection = self.db['tests']
+            self.judge_cache_collection = self.db['judge_cache']
             
             print(f"✅ Connected to MongoDB: {DB_NAME}")
             
@@ -178,25 +180,51 @@ class MongoDBClient:
             print(f"❌ Error querying negotiations: {e}")
             return []
     
-    def get_all_negotiations(self, limit: int = None) -> List[Dict]:
+    def get_all_negotiations(self, limit: int = None, projection: Dict[str, Any] = None) -> List[Dict]:
         """
         Get all negotiations
         
         Args:
             limit: Maximum number of results (None = all)
+            projection: Fields to return (None = whole documents)
             
         Returns:
             List of negotiation documents
         """
         try:
-            query = self.negotiations_collection.find().sort("timestamp", -1)
-            if limit is not None:
-                query = query.limit(limit)
-            return list(query)
+            return list(self.iter_negotiations(projection=projection, limit=limit, newest_first=True))
         except Exception as e:
             print(f"❌ Error querying negotiations: {e}")
             return []
     
+    def iter_negotiations(
+        self,
+        query: Dict[str, Any] = None,
+        projection: Dict[str, Any] = None,
+        limit: int = None,
+        newest_first: bool = False,
+        batch_size: int = None
+    ) -> Iterator[Dict]:
+        """
+        Stream negotiations in batches instead of loading them all at once
+        
+        Args:
+            query: MongoDB filter (None = all negotiations)
+            projection: Fields to return (None = whole documents)
+            limit: Maximum number of results (None = all)
+            newest_first: Sort by timestamp, newest first
+            batch_size: Documents per round trip (default DB_BATCH_SIZE)
+            
+        Returns:
+            Cursor yielding negotiation documents
+        """
+        cursor = self.negotiations_collection.find(query or {}, projection=projection)
+        if newest_first:
+            cursor = cursor.sort("timestamp", -1)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return cursor.batch_size(batch_size or DB_BATCH_SIZE)
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         Get statistics about negotiations
@@ -349,6 +377,46 @@ class MongoDBClient:
         
         return negotiations
     
+    def get_judge_response(self, key: str) -> Optional[str]:
+        """
+        Get a cached Judge response
+        
+        Args:
+            key: Hash of the Judge request
+            
+        Returns:
+            Response text or None if not cached
+        """
+        if self.judge_cache_collection is None:
+            return None
+        
+        try:
+            doc = self.judge_cache_collection.find_one({"_id": key}, {"text": 1})
+            return doc["text"] if doc else None
+        except Exception as e:
+            print(f"❌ Error retrieving Judge response: {e}")
+            return None
+    
+    def save_judge_response(self, key: str, text: str):
+        """
+        Cache a Judge response
+        
+        Args:
+            key: Hash of the Judge request
+            text: Response text
+        """
+        if self.judge_cache_collection is None:
+            return
+        
+        try:
+            self.judge_cache_collection.update_one(
+                {"_id": key},
+                {"$set": {"text": text, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"❌ Error saving Judge response: {e}")
+    
     def close(self):
         """Close MongoDB connection"""
         if self.client: